@@ -0,0 +1,280 @@
+"""
+Local stand-in for the Adobe PDF Services endpoints used by docx_pdf_converter.
+
+Run it and point the converter at it through the environment, no network or
+Adobe credentials needed:
+
+    python adobe_stub_server.py --port 8765 --latency 0.05 --job-seconds 1.5
+    export ADOBE_BASE_URL=http://127.0.0.1:8765 ADOBE_CLIENT_ID=stub ADOBE_CLIENT_SECRET=stub
+"""
+import argparse
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+# Returned when PyMuPDF is not installed, a valid one page PDF
+FIXTURE_PDF = (
+    b"%PDF-1.4\n"
+    b"1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n"
+    b"xref\n0 4\n0000000000 65535 f \n0000000009 00000 n \n0000000052 00000 n \n0000000101 00000 n \n"
+    b"trailer<</Size 4/Root 1 0 R>>\nstartxref\n164\n%%EOF\n"
+)
+
+WORD_TEXT = re.compile(rb"<w:t(?:\s[^>]*)?>([^<]*)</w:t>")
+WORD_PARAGRAPH_END = re.compile(rb"</w:p>")
+
+
+def docx_text(docx_bytes):
+    """Paragraph text of word/document.xml, good enough for a preview render"""
+    with zipfile.ZipFile(io.BytesIO(docx_bytes)) as docx_zip:
+        xml = docx_zip.read("word/document.xml")
+    paragraphs = []
+    for chunk in WORD_PARAGRAPH_END.split(xml):
+        text = b"".join(WORD_TEXT.findall(chunk)).decode("utf-8", "replace")
+        paragraphs.append(text)
+    return "\n".join(paragraphs).strip()
+
+
+def render_pdf(docx_bytes):
+    """Render the DOCX text onto A4 pages with PyMuPDF, or return the fixture PDF"""
+    if fitz is None:
+        return FIXTURE_PDF
+    try:
+        text = docx_text(docx_bytes)
+    except Exception:
+        return FIXTURE_PDF
+
+    pdf = fitz.open()
+    lines = text.splitlines() or [""]
+    lines_per_page = 60
+    for start in range(0, len(lines), lines_per_page):
+        page = pdf.new_page(width=595, height=842)
+        page.insert_textbox(fitz.Rect(50, 50, 545, 792), "\n".join(lines[start:start + lines_per_page]), fontsize=10)
+    data = pdf.tobytes()
+    pdf.close()
+    return data
+
+
+class StubConfig:
+    def __init__(self, latency=0.0, latency_jitter=0.0, failure_rate=0.0, job_seconds=1.0,
+                 token_lifetime=86400, retry_after=None):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.failure_rate = failure_rate
+        self.job_seconds = job_seconds
+        self.token_lifetime = token_lifetime
+        self.retry_after = retry_after
+
+
+class StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tokens = {}  # token -> expires_at
+        self.assets = {}  # asset_id -> bytes or None until uploaded
+        self.jobs = {}  # job_id -> {"asset_id", "ready_at", "pdf_asset_id"}
+        self.requests = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real service
+    config = StubConfig()
+    state = StubState()
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _simulate(self):
+        """Apply the configured latency, returns False if this request should fail"""
+        with self.state.lock:
+            self.state.requests += 1
+        delay = self.config.latency + random.uniform(0, self.config.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+        return random.random() >= self.config.failure_rate
+
+    def _authorized(self):
+        header = self.headers.get("Authorization", "")
+        token = header[len("Bearer "):] if header.startswith("Bearer ") else None
+        with self.state.lock:
+            expires_at = self.state.tokens.get(token)
+        return expires_at is not None and expires_at > time.time()
+
+    def _handle(self, routes):
+        body = self._body()
+        if not self._simulate():
+            return self._send(503, {"error": "injected failure"})
+        for pattern, needs_auth, handler in routes:
+            match = re.fullmatch(pattern, self.path)
+            if match:
+                if needs_auth and not self._authorized():
+                    return self._send(401, {"error": "invalid token"})
+                return handler(body, *match.groups())
+        self._send(404, {"error": f"no route for {self.command} {self.path}"})
+
+    def do_POST(self):
+        self._handle([
+            (r"/token", False, self.token),
+            (r"/assets", True, self.create_asset),
+            (r"/operation/createpdf", True, self.create_pdf),
+        ])
+
+    def do_PUT(self):
+        self._handle([(r"/upload/([\w-]+)", False, self.upload)])
+
+    def do_GET(self):
+        self._handle([
+            (r"/operation/createpdf/([\w-]+)/status", True, self.job_status),
+            (r"/download/([\w-]+)", False, self.download),
+        ])
+
+    def do_DELETE(self):
+        self._handle([(r"/assets/([\w-]+)", True, self.delete_asset)])
+
+    def token(self, body):
+        form = parse_qs(body.decode("utf-8"))
+        if not form.get("client_id") or not form.get("client_secret"):
+            return self._send(400, {"error": "client_id and client_secret required"})
+        token = uuid.uuid4().hex
+        with self.state.lock:
+            self.state.tokens[token] = time.time() + self.config.token_lifetime
+        self._send(200, {"access_token": token, "token_type": "bearer", "expires_in": self.config.token_lifetime})
+
+    def create_asset(self, body):
+        asset_id = uuid.uuid4().hex
+        with self.state.lock:
+            self.state.assets[asset_id] = None
+        self._send(200, {"uploadUri": f"{self.base_url}/upload/{asset_id}", "assetID": asset_id})
+
+    def upload(self, body, asset_id):
+        with self.state.lock:
+            if asset_id not in self.state.assets:
+                return self._send(404, {"error": "unknown asset"})
+            self.state.assets[asset_id] = body
+        self._send(200)
+
+    def create_pdf(self, body):
+        asset_id = json.loads(body or b"{}").get("assetID")
+        with self.state.lock:
+            if self.state.assets.get(asset_id) is None:
+                return self._send(400, {"error": "asset not uploaded"})
+            job_id = uuid.uuid4().hex
+            self.state.jobs[job_id] = {
+                "asset_id": asset_id,
+                "ready_at": time.monotonic() + self.config.job_seconds,
+                "pdf_asset_id": None,
+            }
+        self._send(201, headers={"Location": f"{self.base_url}/operation/createpdf/{job_id}/status"})
+
+    def job_status(self, body, job_id):
+        with self.state.lock:
+            job = self.state.jobs.get(job_id)
+            if job is None:
+                return self._send(404, {"error": "unknown job"})
+            ready = time.monotonic() >= job["ready_at"]
+            docx_bytes = self.state.assets.get(job["asset_id"]) if ready and not job["pdf_asset_id"] else None
+
+        if not ready:
+            headers = {"Retry-After": str(self.config.retry_after)} if self.config.retry_after else None
+            return self._send(200, {"status": "in progress"}, headers=headers)
+
+        if docx_bytes is not None:
+            pdf_asset_id = uuid.uuid4().hex
+            pdf_bytes = render_pdf(docx_bytes)
+            with self.state.lock:
+                self.state.assets[pdf_asset_id] = pdf_bytes
+                job["pdf_asset_id"] = pdf_asset_id
+        self._send(200, {
+            "status": "done",
+            "asset": {"assetID": job["pdf_asset_id"], "downloadUri": f"{self.base_url}/download/{job['pdf_asset_id']}"},
+        })
+
+    def download(self, body, asset_id):
+        with self.state.lock:
+            data = self.state.assets.get(asset_id)
+        if data is None:
+            return self._send(404, {"error": "unknown asset"})
+        self._send(200, data, content_type="application/pdf")
+
+    def delete_asset(self, body, asset_id):
+        with self.state.lock:
+            self.state.assets.pop(asset_id, None)
+        self._send(204)
+
+
+def start_stub_server(host="127.0.0.1", port=0, config=None):
+    """Start the stand-in on a background thread, returns (server, base_url)"""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config or StubConfig(), "state": StubState()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="adobe-stub-server", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for Adobe PDF Services")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="extra random latency up to this")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--job-seconds", type=float, default=1.0, help="how long a job stays 'in progress'")
+    parser.add_argument("--token-lifetime", type=int, default=86400)
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After sent while in progress")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        failure_rate=args.failure_rate,
+        job_seconds=args.job_seconds,
+        token_lifetime=args.token_lifetime,
+        retry_after=args.retry_after,
+    )
+    server, base_url = start_stub_server(args.host, args.port, config)
+    print(f"Adobe stand-in listening on {base_url}")
+    print(f"export ADOBE_BASE_URL={base_url} ADOBE_CLIENT_ID=stub ADOBE_CLIENT_SECRET=stub")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+
+
+class AssetDeletionQueue:
+    """
+    Deletes Adobe assets on a background worker thread.
+
+    Asset IDs are written to a JSON backlog file as soon as they are queued and
+    removed once deleted, so anything still pending when the process stops is
+    picked up again by the next one. The worker deletes up to batch_size assets per
+    round and retries failures with a growing delay up to max_attempts times.
+    """
+
+    def __init__(self, delete_func, backlog_path, batch_size=10, max_attempts=5, retry_delay=5):
+        self.delete_func = delete_func
+        self.backlog_path = backlog_path
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._pending = {}  # asset_id -> {"attempts": n, "not_before": timestamp}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._in_progress = 0
+        self._load_backlog()
+
+    def _load_backlog(self):
+        if not os.path.exists(self.backlog_path):
+            return
+        try:
+            with open(self.backlog_path, "r") as f:
+                for asset_id in json.load(f):
+                    self._pending[asset_id] = {"attempts": 0, "not_before": 0}
+        except Exception as e:
+            print(f"⚠️ Could not read asset deletion backlog {self.backlog_path}: {e}")
+
+    def _save_backlog(self):
+        """Persist the pending IDs, must be called with the condition held"""
+        tmp_path = self.backlog_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(list(self._pending), f)
+            os.replace(tmp_path, self.backlog_path)
+        except Exception as e:
+            print(f"⚠️ Could not write asset deletion backlog {self.backlog_path}: {e}")
+
+    def start(self):
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="adobe-asset-cleanup", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, asset_id):
+        with self._condition:
+            self._pending[asset_id] = {"attempts": 0, "not_before": 0}
+            self._save_backlog()
+            self._condition.notify()
+        self.start()
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+
+    def flush(self, timeout=None):
+        """Block until the queue is empty, returns False if timeout expired first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.start()
+        with self._condition:
+            self._condition.notify()
+            while self._pending or self._in_progress:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def _next_batch(self):
+        """Wait for due assets and take up to batch_size of them, must be called with the condition held"""
+        while True:
+            now = time.monotonic()
+            due = [asset_id for asset_id, entry in self._pending.items() if entry["not_before"] <= now]
+            if due:
+                return due[:self.batch_size]
+            if self._pending:
+                next_due = min(entry["not_before"] for entry in self._pending.values())
+                self._condition.wait(max(next_due - now, 0))
+            else:
+                self._condition.wait()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                batch = self._next_batch()
+                self._in_progress = len(batch)
+
+            results = {}
+            for asset_id in batch:
+                try:
+                    self.delete_func(asset_id)
+                    results[asset_id] = None
+                except Exception as e:
+                    results[asset_id] = e
+
+            with self._condition:
+                for asset_id, error in results.items():
+                    entry = self._pending.get(asset_id)
+                    if entry is None:
+                        continue
+                    if error is None:
+                        del self._pending[asset_id]
+                        continue
+                    entry["attempts"] += 1
+                    if entry["attempts"] >= self.max_attempts:
+                        print(f"❌ Giving up deleting Adobe asset {asset_id}: {error}")
+                        del self._pending[asset_id]
+                    else:
+                        entry["not_before"] = time.monotonic() + self.retry_delay * (2 ** (entry["attempts"] - 1))
+                self._in_progress = 0
+                self._save_backlog()
+                self._condition.notify_all()
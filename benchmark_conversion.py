@@ -0,0 +1,80 @@
+"""
+Measure throughput and tail latency of the conversion pipeline against the
+local Adobe stand-in, e.g.
+
+    python benchmark_conversion.py --documents 200 --concurrency 32 --job-seconds 1.5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from docx import Document
+
+from adobe_stub_server import StubConfig, start_stub_server
+
+
+def make_sample_docx(path, paragraphs=200):
+    doc = Document()
+    for i in range(paragraphs):
+        doc.add_paragraph(f"Paragraph {i + 1}: the quick brown fox jumps over the lazy dog.")
+    doc.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark docx_pdf_converter against the local Adobe stand-in")
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch", action="store_true", help="use convert_many instead of concurrent convert()")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--latency-jitter", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--job-seconds", type=float, default=1.0)
+    parser.add_argument("--rate", type=float, default=1000, help="outbound requests per second allowed")
+    args = parser.parse_args()
+
+    config = StubConfig(latency=args.latency, latency_jitter=args.latency_jitter,
+                        failure_rate=args.failure_rate, job_seconds=args.job_seconds)
+    server, base_url = start_stub_server(config=config)
+    os.environ.update({"ADOBE_BASE_URL": base_url, "ADOBE_CLIENT_ID": "stub", "ADOBE_CLIENT_SECRET": "stub"})
+
+    # Imported after the environment points at the stand-in
+    import docx_pdf_converter
+    from conversion_metrics import stage_summary
+
+    docx_pdf_converter.set_max_concurrency(args.concurrency)
+    docx_pdf_converter.configure_rate_limits(rate=args.rate, burst=max(int(args.rate), 1),
+                                             max_concurrent=args.concurrency)
+    work_dir = tempfile.mkdtemp(prefix="hvt_benchmark_")
+    docx_path = os.path.join(work_dir, "sample.docx")
+    make_sample_docx(docx_path)
+    jobs = [(docx_path, os.path.join(work_dir, f"out_{i}.pdf")) for i in range(args.documents)]
+
+    start = time.perf_counter()
+    if args.batch:
+        results = docx_pdf_converter.convert_many(jobs, use_cache=False)
+        failures = sum(1 for result in results if result.error is not None)
+    else:
+        async def run_all():
+            return await asyncio.gather(
+                *(docx_pdf_converter.convert(docx, output_filename=pdf) for docx, pdf in jobs),
+                return_exceptions=True)
+
+        results = docx_pdf_converter.run_sync(run_all())
+        failures = sum(1 for result in results if isinstance(result, Exception))
+    elapsed = time.perf_counter() - start
+    docx_pdf_converter.asset_deletion_queue.flush(timeout=30)
+    server.shutdown()
+
+    print(f"{args.documents} documents in {elapsed:.2f}s "
+          f"({args.documents / elapsed:.1f} docs/s), {failures} failed")
+    print(f"{'stage':<10}{'count':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'retries':>9}")
+    for stage, stats in stage_summary().items():
+        print(f"{stage:<10}{stats['count']:>7}{stats['p50']:>9.3f}{stats['p90']:>9.3f}"
+              f"{stats['p99']:>9.3f}{stats['max']:>9.3f}{stats['retries']:>9}")
+    print(f"rate limiter: {docx_pdf_converter.adobe_rate_limiter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Compare the compiled placeholder engine in contract_edit with the old
+replace-every-placeholder-in-every-paragraph loop as documents grow, then
+time replace_docx_placeholders end to end on saved files: the streaming
+renderer production uses against the python-docx document model fallback.
+
+    python benchmark_placeholders.py --sizes 100 1000 5000 --placeholders 40
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from docx import Document
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+from contract_edit import (PlaceholderEngine, iter_story_elements, process_paragraph,
+                           replace_docx_placeholders, replace_with_document_model)
+
+
+def make_document(paragraphs, placeholders, with_placeholder_every=10):
+    doc = Document()
+    names = [f"_Field {i}_" for i in range(placeholders)]
+    for i in range(paragraphs):
+        if i % with_placeholder_every == 0:
+            run_text = f"Clause {i}: the client {names[i % placeholders]} agrees to the terms."
+            paragraph = doc.add_paragraph()
+            # Split across runs the way Word often does
+            middle = len(run_text) // 2
+            paragraph.add_run(run_text[:middle])
+            paragraph.add_run(run_text[middle:])
+        else:
+            doc.add_paragraph(f"Clause {i}: the quick brown fox jumps over the lazy dog.")
+    table = doc.add_table(rows=max(paragraphs // 50, 1), cols=3)
+    for row_index, row in enumerate(table.rows):
+        row.cells[0].text = names[row_index % placeholders]
+    doc.sections[0].footer.paragraphs[0].text = f"Footer {names[0]}"
+    return doc, {name: f"Value {i}" for i, name in enumerate(names)}
+
+
+def legacy_pass(doc, replacements):
+    """The previous implementation: body and top-level tables, str.replace per placeholder"""
+    def process(paragraph):
+        full_text = ''.join(run.text for run in paragraph.runs)
+        for placeholder, value in replacements.items():
+            full_text = full_text.replace(placeholder, value)
+        for run in paragraph.runs:
+            run.text = ''
+        if paragraph.runs:
+            paragraph.runs[0].text = full_text
+
+    for paragraph in doc.paragraphs:
+        process(paragraph)
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for paragraph in cell.paragraphs:
+                    process(paragraph)
+
+
+def engine_pass(doc, replacements):
+    engine = PlaceholderEngine(replacements)
+    for element, parent in iter_story_elements(doc):
+        for p in element.iter(qn("w:p")):
+            process_paragraph(Paragraph(p, parent), engine)
+
+
+def file_passes(work_dir, size, placeholders):
+    """(streaming seconds, document model seconds) for one saved document, load and save included"""
+    doc, replacements = make_document(size, placeholders)
+    input_path = os.path.join(work_dir, f"input_{size}.docx")
+    output_path = os.path.join(work_dir, f"output_{size}.docx")
+    doc.save(input_path)
+    # replace_docx_placeholders prints a line per document
+    with contextlib.redirect_stdout(io.StringIO()):
+        stream = timed(replace_docx_placeholders, input_path, output_path, replacements)
+    model = timed(lambda: replace_with_document_model(input_path, output_path, PlaceholderEngine(replacements)))
+    return stream, model
+
+
+def timed(func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark placeholder replacement in contract_edit")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000], help="paragraph counts")
+    parser.add_argument("--placeholders", type=int, default=40)
+    args = parser.parse_args()
+
+    print(f"{'paragraphs':>10}{'legacy s':>12}{'engine s':>12}{'speedup':>10}")
+    for size in args.sizes:
+        # Fresh documents for every run, both passes modify them in place
+        legacy = timed(lambda: legacy_pass(*make_document(size, args.placeholders)))
+        build = timed(lambda: make_document(size, args.placeholders))
+        engine = timed(lambda: engine_pass(*make_document(size, args.placeholders)))
+        legacy, engine = max(legacy - build, 1e-9), max(engine - build, 1e-9)
+        print(f"{size:>10}{legacy:>12.4f}{engine:>12.4f}{legacy / engine:>9.1f}x")
+
+    print()
+    print("replace_docx_placeholders on files, load and save included")
+    print(f"{'paragraphs':>10}{'stream s':>12}{'docx s':>12}{'speedup':>10}")
+    with tempfile.TemporaryDirectory(prefix="hvt_placeholder_benchmark_") as work_dir:
+        for size in args.sizes:
+            stream, model = file_passes(work_dir, size, args.placeholders)
+            print(f"{size:>10}{stream:>12.4f}{model:>12.4f}{model / stream:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import csv
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+from nda_edit import nda_edit
+
+try:
+    # Only needed for .xlsx uploads
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Rendered DOCX files handed to the PDF converter per call
+CONVERSION_BATCH_SIZE = 10
+
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%B %d, %Y", "%d %B %Y"]
+
+BULK_COLUMNS = {
+    "Internship Offer": ["name", "position", "start_date", "stipend", "hours", "duration", "first_paycheck_date"],
+    "NDA": ["date", "client_name", "client_company_name", "client_company_address"],
+}
+OPTIONAL_COLUMNS = {"first_paycheck_date"}
+
+
+def pad_nda_client_name(name):
+    """Leading spaces the NDA template expects before the client name"""
+    space_ = " "
+    if len(name) >= 9:
+        lenght_dif = len(name) - 9
+    else:
+        lenght_dif = 9 - len(name)
+    return f"{space_ * lenght_dif}      {name}"
+
+
+def normalize_header(header):
+    return str(header or "").strip().lower().replace(" ", "_")
+
+
+def read_rows(filename, data):
+    """Rows of an uploaded CSV or XLSX file as dicts keyed by normalized header"""
+    if filename.lower().endswith(".xlsx"):
+        if openpyxl is None:
+            raise ValueError("Reading .xlsx files needs openpyxl, upload a CSV instead")
+        workbook = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        values = list(workbook.active.iter_rows(values_only=True))
+        workbook.close()
+    else:
+        values = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+
+    if not values:
+        return []
+    headers = [normalize_header(header) for header in values[0]]
+    rows = []
+    for line in values[1:]:
+        if not any(str(value).strip() for value in line if value is not None):
+            continue
+        rows.append({header: line[i] if i < len(line) else None for i, header in enumerate(headers)})
+    return rows
+
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"'{text}' is not a date (use YYYY-MM-DD)")
+
+
+def cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def offer_context(row, positions=None):
+    name = cell_text(row.get("name"))
+    if not name:
+        raise ValueError("name is empty")
+    position = cell_text(row.get("position"))
+    if positions and position not in positions:
+        raise ValueError(f"position '{position}' is not one of the internship positions")
+    start_date = parse_date(row.get("start_date"))
+    stipend = cell_text(row.get("stipend"))
+    if not stipend.isdigit():
+        raise ValueError("stipend must be digits only")
+    hours = cell_text(row.get("hours"))
+    if not hours.isdigit():
+        raise ValueError("hours must be digits only")
+    duration = cell_text(row.get("duration"))
+    if not duration.isdigit() or not 1 <= int(duration) <= 24:
+        raise ValueError("duration must be a whole number of months from 1 to 24")
+    first_paycheck = row.get("first_paycheck_date")
+    first_paycheck = parse_date(first_paycheck) if cell_text(first_paycheck) else start_date + timedelta(days=30)
+
+    context = {
+        "date": start_date.strftime("%B %d, %Y"),
+        "name": name,
+        "position": position,
+        "stipend": "{:,}".format(int(stipend)),
+        "hours": hours,
+        "internship_duration": str(int(duration)),
+        "first_paycheque_date": first_paycheck.strftime("%B %d, %Y"),
+    }
+    return context, f"{name} Offer Letter"
+
+
+def nda_context(row, positions=None):
+    values = {column: cell_text(row.get(column)) for column in BULK_COLUMNS["NDA"]}
+    for column in ["client_name", "client_company_name"]:
+        if not values[column]:
+            raise ValueError(f"{column} is empty")
+    context = {
+        "date": parse_date(row.get("date")).strftime("%B %d, %Y"),
+        "client_name": pad_nda_client_name(values["client_name"]),
+        "client_company_name": values["client_company_name"],
+        "client_company_address": values["client_company_address"],
+    }
+    return context, f"{values['client_company_name']} NDA"
+
+
+CONTEXT_BUILDERS = {
+    "Internship Offer": offer_context,
+    "NDA": nda_context,
+}
+
+
+def validate_rows(rows, doc_type, positions=None):
+    """
+    Build a render job for every row. Returns (jobs, errors), errors is a list of
+    (row_number, message) with row numbers as shown in a spreadsheet.
+    """
+    columns = BULK_COLUMNS[doc_type]
+    jobs = []
+    errors = []
+    if not rows:
+        return jobs, [(1, "the file has no data rows")]
+
+    missing = [column for column in columns if column not in rows[0] and column not in OPTIONAL_COLUMNS]
+    if missing:
+        return jobs, [(1, f"missing column(s): {', '.join(missing)}")]
+
+    used_names = set()
+    for index, row in enumerate(rows):
+        row_number = index + 2  # header is row 1
+        try:
+            context, name = CONTEXT_BUILDERS[doc_type](row, positions)
+        except Exception as e:
+            errors.append((row_number, str(e)))
+            continue
+
+        # Keep file names unique inside the zip
+        filename = name.replace("/", "-")
+        suffix = 2
+        while filename in used_names:
+            filename = f"{name} ({suffix})".replace("/", "-")
+            suffix += 1
+        used_names.add(filename)
+        jobs.append({"row": row_number, "name": name, "filename": filename, "context": context})
+    return jobs, errors
+
+
+def render_document(template_path, output_path, context):
+    """Runs in a worker process, each worker keeps its own parsed template cache"""
+    nda_edit(template_path, output_path, context)
+    return output_path
+
+
+def render_all(template_path, jobs, work_dir, progress=None, max_workers=None):
+    """Render every job's DOCX on a process pool, sets job["docx"] or job["error"]"""
+    # spawn, not fork: the app process has Firestore and scheduler threads running
+    context = multiprocessing.get_context("spawn")
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs)) or 1
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        futures = {}
+        for job in jobs:
+            output_path = os.path.join(work_dir, f"{job['filename']}.docx")
+            futures[pool.submit(render_document, template_path, output_path, job["context"])] = job
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                job["docx"] = future.result()
+                status = "rendered"
+            except Exception as e:
+                job["error"] = f"render failed: {e}"
+                status = "failed"
+            if progress:
+                progress(job, status)
+
+
+def convert_all(converter, jobs, doc_type, progress=None, batch_size=CONVERSION_BATCH_SIZE):
+    """Convert the rendered jobs in batches, sets job["pdf"] or job["error"]"""
+    rendered = [job for job in jobs if job.get("docx")]
+    for start in range(0, len(rendered), batch_size):
+        batch = rendered[start:start + batch_size]
+        results = converter.convert_many(
+            [(job["docx"], os.path.splitext(job["docx"])[0] + ".pdf") for job in batch], doc_type=doc_type)
+        for job, result in zip(batch, results):
+            if result.error is None:
+                job["pdf"] = result.pdf_filename
+                status = "done"
+            else:
+                job["error"] = f"PDF conversion failed: {result.error}"
+                status = "failed"
+            if progress:
+                progress(job, status)
+
+
+def bundle_zip(jobs, zip_path):
+    """Zip every finished PDF and DOCX with a summary.csv of each row's outcome"""
+    summary = io.StringIO()
+    writer = csv.writer(summary)
+    writer.writerow(["row", "name", "status", "error"])
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        for job in sorted(jobs, key=lambda job: job["row"]):
+            if job.get("pdf"):
+                bundle.write(job["pdf"], f"pdf/{job['filename']}.pdf")
+            if job.get("docx"):
+                bundle.write(job["docx"], f"docx/{job['filename']}.docx")
+            writer.writerow([job["row"], job["name"], "failed" if job.get("error") else "done", job.get("error", "")])
+        bundle.writestr("summary.csv", summary.getvalue())
+    return zip_path
+
+
+def sample_csv(doc_type):
+    """Header row for the download-a-template button"""
+    return ",".join(BULK_COLUMNS[doc_type]) + "\n"
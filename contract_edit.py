@@ -1,41 +1,101 @@
+import re
+
 from docx import Document
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+from docx_stream_render import render_docx, replace_across_runs
+
+
+class PlaceholderEngine:
+    """
+    All placeholders compiled into one alternation regex, longest first, so a
+    paragraph is scanned once whatever the number of placeholders. Text that
+    contains none of the placeholders' first characters is skipped without
+    running the full pattern.
+    """
+
+    def __init__(self, replacements):
+        self.replacements = {placeholder: str(value) for placeholder, value in replacements.items() if placeholder}
+        placeholders = sorted(self.replacements, key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape(p) for p in placeholders)) if placeholders else None
+        prefixes = sorted({p[0] for p in placeholders})
+        self.prefix_pattern = re.compile("[" + "".join(re.escape(c) for c in prefixes) + "]") if prefixes else None
+
+    def could_match(self, text):
+        return self.prefix_pattern is not None and self.prefix_pattern.search(text) is not None
+
+    def substitute(self, text):
+        """Returns (new_text, number_of_replacements)"""
+        if not self.could_match(text):
+            return text, 0
+        return self.pattern.subn(lambda match: self.replacements[match.group(0)], text)
+
 
 def process_paragraph(paragraph, replacements):
     """Replace placeholders across all runs in a paragraph while preserving style outside placeholders."""
+    engine = replacements if isinstance(replacements, PlaceholderEngine) else PlaceholderEngine(replacements)
+    runs = paragraph.runs
+    if not runs:
+        return False
+
     # Combine all runs' text
-    full_text = ''.join(run.text for run in paragraph.runs)
+    full_text = ''.join(run.text for run in runs)
 
-    # Replace placeholders
-    for placeholder, value in replacements.items():
-        full_text = full_text.replace(placeholder, value)
+    # Replace placeholders in one pass, paragraphs without any are left untouched
+    full_text, count = engine.substitute(full_text)
+    if not count:
+        return False
 
     # Clear existing runs
-    for run in paragraph.runs:
+    for run in runs:
         run.text = ''
 
     # Assign new text to the first run
-    if paragraph.runs:
-        paragraph.runs[0].text = full_text
+    runs[0].text = full_text
+    return True
 
-def replace_docx_placeholders(input_path, output_path, replacements):
-    """
-    Replace placeholders in a Word document (paragraphs and tables).
-    Handles placeholders split across multiple runs.
-    """
-    doc = Document(input_path)
 
-    # Process all paragraphs
-    for paragraph in doc.paragraphs:
-        process_paragraph(paragraph, replacements)
+def iter_story_elements(doc):
+    """Body, then every distinct header and footer part, each once"""
+    seen = set()
+    elements = [(doc.element.body, doc)]
+    for section in doc.sections:
+        for story in (section.header, section.first_page_header, section.even_page_header,
+                      section.footer, section.first_page_footer, section.even_page_footer):
+            # A linked header has no part of its own, it shows the previous section's
+            if not story.is_linked_to_previous:
+                elements.append((story._element, story))
+    for element, parent in elements:
+        if id(element) not in seen:
+            seen.add(id(element))
+            yield element, parent
+
+
+def replace_with_document_model(input_path, output_path, engine):
+    """The same replacement through python-docx's Document, used if the streaming renderer fails"""
+    doc = Document(input_path)
 
-    # Process all table cells
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    process_paragraph(paragraph, replacements)
+    # Every w:p in a story, in document order, including those inside tables
+    for element, parent in iter_story_elements(doc):
+        for p in element.iter(qn("w:p")):
+            process_paragraph(Paragraph(p, parent), engine)
 
     doc.save(output_path)
+
+
+def replace_docx_placeholders(input_path, output_path, replacements):
+    """
+    Replace placeholders in a Word document: body, tables at any nesting depth,
+    text boxes, headers and footers. Handles placeholders split across
+    multiple runs.
+    """
+    engine = PlaceholderEngine(replacements)
+    try:
+        render_docx(input_path, output_path, lambda p: replace_across_runs(p, engine))
+    except Exception as e:
+        print(f"⚠️ Streaming render of {input_path} failed, using python-docx: {e}")
+        replace_with_document_model(input_path, output_path, engine)
     print(f"Successfully generated contract at: {output_path}")
 
 # Example replacements
@@ -0,0 +1,128 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Samples kept per stage for the in-process percentiles
+MAX_SAMPLES = 1000
+
+_hooks = []
+_samples = {}
+_totals = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def add_metrics_hook(hook):
+    """
+    Register a callable that receives every stage event as a dict with the keys
+    stage, doc_type, seconds, bytes, retries, polls and ok.
+    """
+    _hooks.append(hook)
+
+
+def remove_metrics_hook(hook):
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+class StageTiming:
+    """Wall time, bytes, retries and poll iterations of one conversion stage"""
+
+    def __init__(self, stage, doc_type=None):
+        self.stage = stage
+        self.doc_type = doc_type
+        self.bytes = 0
+        self.retries = 0
+        self.polls = 0
+        self._start = time.perf_counter()
+
+    def finish(self, ok=True):
+        event = {
+            "stage": self.stage,
+            "doc_type": self.doc_type,
+            "seconds": time.perf_counter() - self._start,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "polls": self.polls,
+            "ok": ok,
+        }
+        record_event(event)
+        return event
+
+
+@contextmanager
+def measure_stage(stage, doc_type=None):
+    """Time the enclosed block as one stage, it is recorded as failed if the block raises"""
+    timing = StageTiming(stage, doc_type)
+    try:
+        yield timing
+    except BaseException:
+        timing.finish(ok=False)
+        raise
+    timing.finish()
+
+
+def record_event(event):
+    with _lock:
+        stage = event["stage"]
+        _samples.setdefault(stage, deque(maxlen=MAX_SAMPLES)).append(event["seconds"])
+        totals = _totals.setdefault(stage, {"count": 0, "failures": 0, "bytes": 0, "retries": 0, "polls": 0})
+        totals["count"] += 1
+        totals["failures"] += 0 if event["ok"] else 1
+        totals["bytes"] += event["bytes"]
+        totals["retries"] += event["retries"]
+        totals["polls"] += event["polls"]
+
+    for hook in list(_hooks):
+        try:
+            hook(event)
+        except Exception as e:
+            print(f"⚠️ Metrics hook failed: {e}")
+
+
+def call_with_timing(timing, func, *args):
+    """Run func on this thread, counting the request retries it makes against timing"""
+    previous = getattr(_local, "timing", None)
+    _local.timing = timing
+    try:
+        return func(*args)
+    finally:
+        _local.timing = previous
+
+
+def note_retry():
+    """Called by the request retry helper, charged to the stage running on this thread"""
+    timing = getattr(_local, "timing", None)
+    if timing is not None:
+        timing.retries += 1
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def stage_summary():
+    """Per-stage count, totals and p50/p90/p99/max wall time in seconds over the recent samples"""
+    with _lock:
+        summary = {}
+        for stage, samples in _samples.items():
+            values = sorted(samples)
+            summary[stage] = dict(
+                _totals[stage],
+                p50=percentile(values, 50),
+                p90=percentile(values, 90),
+                p99=percentile(values, 99),
+                max=values[-1] if values else None,
+            )
+        return summary
+
+
+def reset_metrics():
+    with _lock:
+        _samples.clear()
+        _totals.clear()
@@ -1,17 +1,25 @@
+import functools
 import os
 from datetime import datetime, timedelta
 import pycountry
 import streamlit as st
 from nda_edit import nda_edit
-from docx_pdf_converter import main_converter
+from bulk_generation import (bundle_zip, convert_all, pad_nda_client_name, read_rows, render_all, sample_csv,
+                             validate_rows, BULK_COLUMNS)
+from pdf_converters import get_pdf_converter
+from template_cache import proposal_template_cache
+from template_registry import DOCX_MIME_TYPE, load_template_registry
+from template_store import blob_listing, download_in_parallel, template_store
 from edit_proposal_cover_1 import replace_pdf_placeholders
 from merge_pdf import Merger
+import shutil
 import tempfile
 from firebase_conf import auth, rt_db, bucket, firestore_db
 import pdfplumber
 from firebase_admin import storage
 import json
 import base64
+import requests
 import random
 # import os
 # from datetime import datetime
@@ -180,6 +188,15 @@ def pdf_view(file_input):
         st.warning(f"Couldn't generate PDF preview: {str(e)}")
 
 
+def download_url_to_file(file_url, file_path):
+    response = requests.get(file_url, stream=True, timeout=(10, 60))
+    if response.status_code != 200:
+        raise Exception(f"HTTP {response.status_code}")
+    with open(file_path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            f.write(chunk)
+
+
 def fetch_and_organize_templates(firestore_db, base_temp_dir=None):
     # Base temp dir
     if not base_temp_dir:
@@ -187,6 +204,7 @@ def fetch_and_organize_templates(firestore_db, base_temp_dir=None):
 
     # Main collection reference
     collection_ref = firestore_db.collection("hvt_generator")
+    tasks = []
 
     # Iterate through each document type (e.g., Proposal, NDA, etc.)
     doc_types = collection_ref.stream()
@@ -210,21 +228,147 @@ def fetch_and_organize_templates(firestore_db, base_temp_dir=None):
             os.makedirs(target_dir, exist_ok=True)
 
             file_path = os.path.join(target_dir, file_name)
+            tasks.append((file_path, functools.partial(download_url_to_file, file_url, file_path)))
 
-            try:
-                # Download the file
-                response = requests.get(file_url)
-                if response.status_code == 200:
-                    with open(file_path, 'wb') as f:
-                        f.write(response.content)
-                else:
-                    print(f"Failed to download {file_name} (HTTP {response.status_code})")
-            except Exception as e:
-                print(f"Error downloading {file_name}: {str(e)}")
-
+    download_in_parallel(tasks)
     return base_temp_dir
 
 
+def first_available_public_docx(doc_type):
+    """Lowest ordered public DOCX template whose blob is in storage, or None"""
+    # Templates ordered by order_number, from the in-memory registry
+    templates = load_template_registry(firestore_db).ordered(doc_type)
+
+    for t_id, t_data in templates:
+        if (
+                t_data.get("visibility") == "Public" and
+                t_data.get("file_type") == DOCX_MIME_TYPE and
+                t_data.get("storage_path")
+        ):
+            # Checked against one cached listing of the bucket, no request per template
+            if blob_listing.exists(bucket, t_data["storage_path"]):
+                return t_data
+            print(f"❌ Skipping missing file: {t_data['storage_path']}")
+    return None
+
+
+def first_nda_template():
+    """
+    The NDA flows' template: the lowest order_number, refused unless it is a
+    public DOCX. Returns (template_data, error_message).
+    """
+    # First template by order_number, from the in-memory registry
+    template_data = load_template_registry(firestore_db).first_template("NDA")
+
+    if not template_data:
+        return None, "No templates found in the database for NDA"
+
+    # Visibility check
+    if template_data.get('visibility', 'Private') != 'Public':
+        return None, "This NDA template is not currently available"
+
+    # File type check
+    if template_data.get('file_type') != DOCX_MIME_TYPE:
+        return None, "Template is not a valid Word document (.docx)"
+
+    # Check if storage_path exists
+    if 'storage_path' not in template_data:
+        return None, "Template storage path not found in the database"
+    return template_data, None
+
+
+def bulk_template(doc_type):
+    """Resolve the template the same way the single-document flow of doc_type does"""
+    if doc_type == "NDA":
+        return first_nda_template()
+    template_data = first_available_public_docx(doc_type)
+    if not template_data:
+        return None, "No valid public templates found in storage"
+    return template_data, None
+
+
+def load_internship_positions():
+    with open("roles.json", "r") as f:
+        return json.load(f).get("internship_position", [])
+
+
+def handle_bulk_generation(doc_type):
+    """Generate one document per row of an uploaded CSV/XLSX and offer them as a zip"""
+    st.caption(f"One row per document. Columns: {', '.join(BULK_COLUMNS[doc_type])}. Dates as YYYY-MM-DD.")
+    st.download_button("⬇️ Download CSV template", sample_csv(doc_type),
+                       file_name=f"{doc_type.lower().replace(' ', '_')}_bulk.csv", mime="text/csv")
+    uploaded = st.file_uploader("Upload CSV or XLSX", type=["csv", "xlsx"], key=f"bulk_upload_{doc_type}")
+    zip_key = f"bulk_zip_{doc_type}"
+    if not uploaded:
+        return
+
+    try:
+        rows = read_rows(uploaded.name, uploaded.getvalue())
+    except Exception as e:
+        st.error(f"Could not read {uploaded.name}: {str(e)}")
+        return
+
+    positions = None
+    if doc_type == "Internship Offer":
+        try:
+            positions = load_internship_positions()
+        except Exception as e:
+            st.warning(f"Could not load internship positions, not checking them: {str(e)}")
+
+    # Every row is checked before anything is generated
+    jobs, errors = validate_rows(rows, doc_type, positions)
+    if errors:
+        st.error(f"{len(errors)} row(s) need fixing before anything is generated")
+        for row_number, message in errors:
+            st.write(f"Row {row_number}: {message}")
+        return
+    st.success(f"All {len(jobs)} rows are valid")
+
+    if st.button(f"Generate {len(jobs)} documents", key=f"bulk_generate_{doc_type}"):
+        template_data, error = bulk_template(doc_type)
+        if error:
+            st.error(error)
+            return
+
+        work_dir = tempfile.mkdtemp(prefix="hvt_bulk_")
+        try:
+            template_path = template_store.fetch(bucket, template_data["storage_path"],
+                                                 blob_listing.version(bucket, template_data["storage_path"]))
+
+            progress_bar = st.progress(0.0)
+            status_table = st.empty()
+            statuses = {job["row"]: {"row": job["row"], "name": job["name"], "status": "queued"} for job in jobs}
+            steps = {"done": 0}
+
+            def show_progress(job, status):
+                steps["done"] += 2 if status == "failed" and not job.get("docx") else 1
+                statuses[job["row"]]["status"] = job.get("error") or status
+                progress_bar.progress(min(steps["done"] / (2 * len(jobs)), 1.0))
+                status_table.table(list(statuses.values()))
+
+            status_table.table(list(statuses.values()))
+            render_all(template_path, jobs, work_dir, progress=show_progress)
+            convert_all(get_pdf_converter(), jobs, doc_type, progress=show_progress)
+
+            zip_path = bundle_zip(jobs, os.path.join(work_dir, f"{doc_type} documents.zip"))
+            with open(zip_path, "rb") as f:
+                st.session_state[zip_key] = f.read()
+
+            failed = len([job for job in jobs if job.get("error")])
+            if failed:
+                st.warning(f"{len(jobs) - failed} of {len(jobs)} documents generated, see summary.csv in the zip")
+            else:
+                st.success(f"All {len(jobs)} documents generated")
+        except Exception as e:
+            st.error(f"Bulk generation failed: {str(e)}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if st.session_state.get(zip_key):
+        st.download_button("⬇️ Download all (ZIP)", st.session_state[zip_key],
+                           file_name=f"{doc_type} documents.zip", mime="application/zip")
+
+
 def handle_internship_offer():
     st.title("📄 Internship Offer Form")
 
@@ -235,6 +379,11 @@ def handle_internship_offer():
 
     # Step 1: Collect information
     if st.session_state.form_step == 1:
+        mode = st.radio("Generate", ["One offer", "Bulk from CSV/XLSX"], horizontal=True, key="offer_mode")
+        if mode != "One offer":
+            handle_bulk_generation("Internship Offer")
+            return
+
         with st.form("internship_offer_form"):
             name = st.text_input("Candidate Name", placeholder="John Doe")
             json_path = "roles.json"
@@ -310,32 +459,12 @@ def handle_internship_offer():
 
                 # Fetch the template with order_number == 1
                 doc_type = "Internship Offer"
-                template_ref = firestore_db.collection("hvt_generator").document(doc_type)
-                # Get all templates ordered by order_number
-                templates = template_ref.collection("templates").order_by("order_number").get()
-
-                template_doc = None
-                for t in templates:
-                    t_data = t.to_dict()
-                    if (
-                            t_data.get("visibility") == "Public" and
-                            t_data.get(
-                                "file_type") == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" and
-                            t_data.get("storage_path")
-                    ):
-                        blob = bucket.blob(t_data["storage_path"])
-                        if blob.exists():
-                            template_doc = t
-                            break
-                        else:
-                            print(f"❌ Skipping missing file: {t_data['storage_path']}")
-
-                if not template_doc:
+                template_data = first_available_public_docx(doc_type)
+
+                if not template_data:
                     st.error("No valid public templates found in storage")
                     return
 
-                template_data = template_doc.to_dict()
-
                 # templates = template_ref.collection("templates").where("order_number", "==", 1).get()
                 #
                 # if not templates:
@@ -359,19 +488,14 @@ def handle_internship_offer():
                     st.error("Missing storage path in template metadata")
                     return
 
-                blob = bucket.blob(storage_path)
-                if not blob.exists():
-                    # st.warning(f"❌ Skipping missing file: {storage_path}")
-                    return
-
-                template_path = os.path.join(temp_dir, "template.docx")
-                blob.download_to_filename(template_path)
+                # The listing already has the generation, so this is a single download at most
+                template_path = template_store.fetch(bucket, storage_path, blob_listing.version(bucket, storage_path))
 
                 docx_output = os.path.join(temp_dir, "offer.docx")
                 pdf_output = os.path.join(temp_dir, "offer.pdf")
 
                 nda_edit(template_path, docx_output, context)
-                main_converter(docx_output, pdf_output)
+                get_pdf_converter().convert(docx_output, pdf_output, doc_type=doc_type)
 
                 # Preview section
                 st.subheader("Preview")
@@ -466,7 +590,7 @@ def handle_internship_offer():
 
             finally:
                 try:
-                    for file_path in [template_path, docx_output, pdf_output]:
+                    for file_path in [docx_output, pdf_output]:
                         if file_path and os.path.exists(file_path):
                             os.unlink(file_path)
                 except Exception as e:
@@ -483,6 +607,11 @@ def handle_nda():
 
     if st.session_state.nda_form_step == 1:
         # Step 1: Collect information
+        mode = st.radio("Generate", ["One NDA", "Bulk from CSV/XLSX"], horizontal=True, key="nda_mode")
+        if mode != "One NDA":
+            handle_bulk_generation("NDA")
+            return
+
         with st.form("nda_form"):
             date = st.date_input("Agreement Date")
             client_name = st.text_input("Client Name")
@@ -505,16 +634,7 @@ def handle_nda():
         with st.spinner("Loading template and generating offer..."):
             st.button("← Back to Form", on_click=lambda: setattr(st.session_state, 'nda_form_step', 1))
             # 9
-            the_name = st.session_state.nda_data['client_name']
-            space_ = " "
-            if len(the_name) >= 9:
-                lenght_dif = len(the_name) - 9
-                new_text = f"{space_ * lenght_dif}      {the_name}"
-            elif len(the_name) < 9:
-                lenght_dif = 9 - len(the_name)
-                new_text = f"{space_ * lenght_dif}      {the_name}"
-            else:
-                new_text = the_name
+            new_text = pad_nda_client_name(st.session_state.nda_data['client_name'])
             # Generate documents
             replacements_docx = {
                 "date": st.session_state.nda_data["date"],
@@ -527,42 +647,14 @@ def handle_nda():
             # Get template from Firestore
             doc_type = "NDA"  # Changed to match your collection name
             try:
-                template_ref = firestore_db.collection("hvt_generator").document(doc_type)
-                templates = template_ref.collection("templates").order_by("order_number").limit(1).get()
-
-                if not templates:
-                    st.error("No templates found in the database for NDA")
-                    return
-
-                # Get the first template (order_number = 1)
-
-                template_doc = templates[0]
-                template_data = template_doc.to_dict()
-
-                # Visibility check
-                if template_data.get('visibility', 'Private') != 'Public':
-                    st.error("This NDA template is not currently available")
-                    return
-
-                # File type check
-                if template_data.get(
-                        'file_type') != 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-                    st.error("Template is not a valid Word document (.docx)")
-                    return
-
-                # Check if storage_path exists
-                if 'storage_path' not in template_data:
-                    st.error("Template storage path not found in the database")
+                template_data, error = first_nda_template()
+                if error:
+                    st.error(error)
                     return
 
                 # Download the template file from Firebase Storage
                 # bucket = storage.bucket()
-                blob = bucket.blob(template_data['storage_path'])
-
-                # Create a temporary file for the template
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as temp_template:
-                    blob.download_to_filename(temp_template.name)
-                    template_path = temp_template.name
+                template_path = template_store.fetch(bucket, template_data['storage_path'])
 
             except Exception as e:
                 st.error(f"Error fetching template: {str(e)}")
@@ -577,7 +669,7 @@ def handle_nda():
 
                 # Use the downloaded template
                 nda_edit(template_path, docx_output, replacements_docx)
-                main_converter(docx_output, pdf_output)
+                get_pdf_converter().convert(docx_output, pdf_output, doc_type=doc_type)
 
             # Preview section
             st.subheader("Preview")
@@ -664,7 +756,6 @@ def handle_nda():
         # Clean up temp files
         try:
             import os
-            os.unlink(template_path)
             os.unlink(pdf_output)
             os.unlink(docx_output)
         except:
@@ -941,16 +1032,13 @@ def handle_invoice():
             # Get template from Firestore
             doc_type = "Invoice"
             try:
-                template_ref = firestore_db.collection("hvt_generator").document(doc_type)
-                templates = template_ref.collection("templates").order_by("order_number").limit(1).get()
+                # First template by order_number, from the in-memory registry
+                template_data = load_template_registry(firestore_db).first_template(doc_type)
 
-                if not templates:
+                if not template_data:
                     st.error("No invoice templates found in the database")
                     return
 
-                template_doc = templates[0]
-                template_data = template_doc.to_dict()
-
                 if template_data.get('visibility', 'Private') != 'Public':
                     st.error("This invoice template is not currently available")
                     return
@@ -965,11 +1053,7 @@ def handle_invoice():
                     return
 
                 # Download the template
-                blob = bucket.blob(template_data['storage_path'])
-
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as temp_template:
-                    blob.download_to_filename(temp_template.name)
-                    template_path = temp_template.name
+                template_path = template_store.fetch(bucket, template_data['storage_path'])
 
             except Exception as e:
                 st.error(f"Error fetching template: {str(e)}")
@@ -984,7 +1068,7 @@ def handle_invoice():
 
                 # Use the downloaded template
                 invoice_edit(template_path, docx_output, context)
-                main_converter(docx_output, pdf_output)
+                get_pdf_converter().convert(docx_output, pdf_output, doc_type=doc_type)
 
             # Preview section
             st.subheader("Invoice Preview")
@@ -1079,7 +1163,6 @@ def handle_invoice():
 
         # Clean up temp files
         try:
-            os.unlink(template_path)
             os.unlink(pdf_output)
             os.unlink(docx_output)
         except:
@@ -1132,17 +1215,13 @@ def handle_contract():
             # Get template from Firestore
             doc_type = "Contract"  # Adjust if your collection name is different
             try:
-                template_ref = firestore_db.collection("hvt_generator").document(doc_type)
-                templates = template_ref.collection("templates").order_by("order_number").limit(1).get()
+                # First template by order_number, from the in-memory registry
+                template_data = load_template_registry(firestore_db).first_template(doc_type)
 
-                if not templates:
+                if not template_data:
                     st.error(f"No templates found in the database for {doc_type}")
                     return
 
-                # Get the first template (order_number = 1)
-                template_doc = templates[0]
-                template_data = template_doc.to_dict()
-
                 # Visibility check
                 if template_data.get('visibility', 'Private') != 'Public':
                     st.error("This contract template is not currently available")
@@ -1161,12 +1240,7 @@ def handle_contract():
 
                 # Download the template file from Firebase Storage
                 # bucket = storage.bucket()
-                blob = bucket.blob(template_data['storage_path'])
-
-                # Create a temporary file for the template
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as temp_template:
-                    blob.download_to_filename(temp_template.name)
-                    template_path = temp_template.name
+                template_path = template_store.fetch(bucket, template_data['storage_path'])
 
             except Exception as e:
                 st.error(f"Error fetching template: {str(e)}")
@@ -1181,7 +1255,7 @@ def handle_contract():
 
                 # Use the downloaded template
                 nda_edit(template_path, docx_output, context)
-                main_converter(docx_output, pdf_output)
+                get_pdf_converter().convert(docx_output, pdf_output, doc_type=doc_type)
 
             # Preview section
             st.subheader("Preview")
@@ -1253,7 +1327,6 @@ def handle_contract():
         # Clean up temp files
         try:
             import os
-            os.unlink(template_path)
             os.unlink(pdf_output)
             os.unlink(docx_output)
         except Exception as e:
@@ -1273,6 +1346,7 @@ def fetch_proposal_templates_to_temp_dir(firestore_db, bucket):
     }
 
     folder_paths = {}
+    tasks = []
 
     for section_key, section_label in section_map.items():
         target_dir = os.path.join(base_temp_dir, section_key)
@@ -1294,16 +1368,13 @@ def fetch_proposal_templates_to_temp_dir(firestore_db, bucket):
                     filename += ".pdf"
 
                 target_path = os.path.join(target_dir, filename)
-
-                try:
-                    blob = bucket.blob(data["storage_path"])
-                    blob.download_to_filename(target_path)
-                except Exception as e:
-                    print(f"❌ Failed to download {data['storage_path']}: {e}")
+                blob = bucket.blob(data["storage_path"])
+                tasks.append((target_path, functools.partial(blob.download_to_filename, target_path)))
 
         except Exception as e:
             print(f"⚠️ Failed to fetch templates from section {section_key}: {e}")
 
+    download_in_parallel(tasks)
     return folder_paths
 
 
@@ -1340,7 +1411,7 @@ def fetch_path_from_temp_dir(sub_folder, selected_template, folder_paths):
 
 def get_proposal_template_details(firestore_db):
     doc_type = "Proposal"
-    proposal_doc_ref = firestore_db.collection("hvt_generator").document(doc_type)
+    registry = load_template_registry(firestore_db)
 
     # Subcollections map
     section_keys = [
@@ -1354,10 +1425,9 @@ def get_proposal_template_details(firestore_db):
     all_templates = []
 
     for section_key in section_keys:
-        templates = proposal_doc_ref.collection(section_key).stream()
+        templates = registry.documents(doc_type, section_key)
 
-        for doc in templates:
-            data = doc.to_dict()
+        for document_id, data in templates:
             if not data:
                 continue
 
@@ -1381,7 +1451,7 @@ def get_proposal_template_details(firestore_db):
                 "pdf_name": data.get("pdf_name"),
                 "num_pages": data.get("num_pages"),
                 "section_key": section_key,
-                "document_id": doc.id  # Include Firestore document ID for edit/delete
+                "document_id": document_id  # Include Firestore document ID for edit/delete
             }
 
             all_templates.append(file_details)
@@ -1392,78 +1462,9 @@ def get_proposal_template_details(firestore_db):
 import os
 import tempfile
 
-def fetch_and_prepare_proposal_templates(firestore_db, bucket):
-    base_temp_dir = tempfile.mkdtemp(prefix="proposal_templates_")
-
-    section_map = {
-        "cover_page": "Cover Page",
-        "table_of_contents": "Table of Contents",
-        "business_requirement": "Business Requirement",
-        "page_3_6": "Page 3 to 6",
-        "testimonials": "Testimonials"
-    }
-
-    folder_paths = {}
-    downloaded_templates = []
-
-    for section_key, section_label in section_map.items():
-        target_dir = os.path.join(base_temp_dir, section_key)
-        os.makedirs(target_dir, exist_ok=True)
-        folder_paths[section_key] = target_dir
-
-        try:
-            templates_ref = firestore_db.collection("hvt_generator").document("Proposal").collection(section_key)
-            templates = templates_ref.stream()
-
-            for doc in templates:
-                data = doc.to_dict()
-                if not data or not data.get("storage_path"):
-                    continue
-
-                filename = data.get("original_name", doc.id)
-                if not filename.lower().endswith(".pdf"):
-                    filename += ".pdf"
-
-                target_path = os.path.join(target_dir, filename)
-
-                try:
-                    blob = bucket.blob(data["storage_path"])
-                    blob.download_to_filename(target_path)
-
-                    # If successful, add file details to downloaded_templates
-                    file_details = {
-                        "name": data.get("name"),
-                        "original_name": data.get("original_name"),
-                        "doc_type": data.get("doc_type", "Proposal"),
-                        "file_type": data.get("file_type"),
-                        "size_kb": data.get("size_kb"),
-                        "size_bytes": data.get("size_bytes"),
-                        "upload_date": data.get("upload_date"),
-                        "upload_timestamp": data.get("upload_timestamp"),
-                        "download_url": data.get("download_url"),
-                        "storage_path": data.get("storage_path"),
-                        "visibility": data.get("visibility"),
-                        "description": data.get("description"),
-                        "order_number": data.get("order_number"),
-                        "is_active": data.get("is_active", True),
-                        "template_part": data.get("template_part"),
-                        "proposal_section_type": data.get("proposal_section_type", section_key),
-                        "pdf_name": data.get("pdf_name"),
-                        "num_pages": data.get("num_pages"),
-                        "section_key": section_key,
-                        "document_id": doc.id,
-                        "local_path": target_path  # Include the actual downloaded file path
-                    }
-
-                    downloaded_templates.append(file_details)
-
-                except Exception as e:
-                    print(f"❌ Failed to download {data['storage_path']}: {e}")
-
-        except Exception as e:
-            print(f"⚠️ Failed to fetch templates from section {section_key}: {e}")
-
-    return folder_paths, downloaded_templates
+def fetch_and_prepare_proposal_templates(firestore_db, bucket, force_refresh=False):
+    """Proposal templates from the process-wide cache, only new or changed files are downloaded"""
+    return proposal_template_cache.get(firestore_db, bucket, force=force_refresh)
 
 
 def get_specific_templates(all_templates, number_of_pages):
@@ -1,19 +1,251 @@
+import asyncio
+import functools
+import io
+import weakref
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import shutil
 import sys
+import tempfile
+import threading
 import time
+from email.utils import parsedate_to_datetime
+from pdf_conversion_cache import PdfConversionCache, docx_content_hash
+from asset_cleanup import AssetDeletionQueue
+from conversion_metrics import call_with_timing, measure_stage, note_retry
+from rate_limit import RateLimiter, jittered_backoff
 
 UNINITIALIZED_VALUE = 'UNINITIALIZED'
 
+
+def load_config():
+    """Adobe settings, ADOBE_* environment variables (e.g. the local stub server) win over Streamlit secrets"""
+    if os.environ.get('ADOBE_BASE_URL'):
+        return {
+            'BASE_URL': os.environ['ADOBE_BASE_URL'],
+            'CLIENT_ID': os.environ.get('ADOBE_CLIENT_ID', UNINITIALIZED_VALUE),
+            'CLIENT_SECRET': os.environ.get('ADOBE_CLIENT_SECRET', UNINITIALIZED_VALUE),
+        }
+    return {
+        'BASE_URL': st.secrets["adobe"]["BASE_URL"],
+        'CLIENT_ID': st.secrets["adobe"]["CLIENT_ID"],
+        'CLIENT_SECRET': st.secrets["adobe"]["CLIENT_SECRET"],
+    }
+
+
 # Configuration
-CONFIG = {
-    'BASE_URL': st.secrets["adobe"]["BASE_URL"],
-    'CLIENT_ID': st.secrets["adobe"]["CLIENT_ID"],
-    'CLIENT_SECRET': st.secrets["adobe"]["CLIENT_SECRET"],
+CONFIG = load_config()
+
+# Refresh the cached access token this many seconds before Adobe expires it
+TOKEN_EXPIRY_MARGIN = 300
+# Used when the /token response does not include expires_in
+DEFAULT_TOKEN_LIFETIME = 3600
+
+# Connection pool shared by every request the converter makes
+HTTP_POOL_SIZE = 20
+HTTP_TIMEOUT = (10, 60)  # (connect, read) seconds
+HTTP_KEEP_ALIVE = True
+
+# Size of the pieces downloads are streamed in
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Process-wide limits on outbound Adobe requests, shared by every session
+ADOBE_REQUESTS_PER_SECOND = 10
+ADOBE_REQUEST_BURST = 20
+ADOBE_MAX_CONCURRENT_REQUESTS = 8
+
+_http_session = None
+_http_session_lock = threading.Lock()
+adobe_rate_limiter = RateLimiter(ADOBE_REQUESTS_PER_SECOND, ADOBE_REQUEST_BURST, ADOBE_MAX_CONCURRENT_REQUESTS)
+
+
+def configure_rate_limits(rate=None, burst=None, max_concurrent=None):
+    """Replace the shared limiter, requests already waiting finish under the old one"""
+    global adobe_rate_limiter, ADOBE_REQUESTS_PER_SECOND, ADOBE_REQUEST_BURST, ADOBE_MAX_CONCURRENT_REQUESTS
+    ADOBE_REQUESTS_PER_SECOND = rate or ADOBE_REQUESTS_PER_SECOND
+    ADOBE_REQUEST_BURST = burst or ADOBE_REQUEST_BURST
+    ADOBE_MAX_CONCURRENT_REQUESTS = max_concurrent or ADOBE_MAX_CONCURRENT_REQUESTS
+    adobe_rate_limiter = RateLimiter(ADOBE_REQUESTS_PER_SECOND, ADOBE_REQUEST_BURST, ADOBE_MAX_CONCURRENT_REQUESTS)
+
+
+def configure_http_session(pool_size=None, timeout=None, keep_alive=None):
+    """Change the pool settings, the session is rebuilt on the next request"""
+    global HTTP_POOL_SIZE, HTTP_TIMEOUT, HTTP_KEEP_ALIVE, _http_session
+    with _http_session_lock:
+        if pool_size is not None:
+            HTTP_POOL_SIZE = pool_size
+        if timeout is not None:
+            HTTP_TIMEOUT = timeout
+        if keep_alive is not None:
+            HTTP_KEEP_ALIVE = keep_alive
+        old_session, _http_session = _http_session, None
+    if old_session is not None:
+        old_session.close()
+
+
+def get_http_session():
+    """Return the shared keep-alive session, creating it on first use"""
+    global _http_session
+    session = _http_session
+    if session is not None:
+        return session
+
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            if not HTTP_KEEP_ALIVE:
+                session.headers['Connection'] = 'close'
+            _http_session = session
+        return _http_session
+
+
+class StreamedResponse:
+    """
+    A streamed requests.Response that keeps its concurrency slot until it is
+    closed, since the body is only read after request() has returned.
+    """
+
+    def __init__(self, response, slot):
+        self._response = response
+        self._slot = slot
+        self._released = False
+        self._release_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def close(self):
+        try:
+            self._response.close()
+        finally:
+            with self._release_lock:
+                release, self._released = not self._released, True
+            if release:
+                self._slot.__exit__(None, None, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        # A response nobody closed must not hold its slot forever
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def http_request(method, url, **kwargs):
+    """
+    Send a request through the pooled session with the default timeout and the
+    shared rate limits. With stream=True the response holds its concurrency slot
+    until it is closed, use it as a context manager.
+    """
+    kwargs.setdefault('timeout', HTTP_TIMEOUT)
+    if not kwargs.get('stream'):
+        with adobe_rate_limiter.slot():
+            return get_http_session().request(method, url, **kwargs)
+
+    slot = adobe_rate_limiter.slot()
+    slot.__enter__()
+    try:
+        response = get_http_session().request(method, url, **kwargs)
+    except BaseException:
+        slot.__exit__(None, None, None)
+        raise
+    return StreamedResponse(response, slot)
+
+
+class PdfConversionTimeout(Exception):
+    """Raised when an Adobe job is still in progress after the polling deadline"""
+
+
+class PollPolicy:
+    """
+    How retrieve_pdf polls a createpdf job.
+
+    The first status check happens after first_delay seconds, every following wait
+    grows by the backoff factor up to max_delay. A Retry-After header from Adobe
+    overrides the computed wait. After deadline seconds PdfConversionTimeout is raised.
+    """
+
+    def __init__(self, first_delay=0.5, backoff=1.5, max_delay=3.0, deadline=120):
+        self.first_delay = first_delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def delays(self):
+        delay = self.first_delay
+        while True:
+            yield delay
+            delay = min(delay * self.backoff, self.max_delay)
+
+
+# Short letters and invoices finish quickly, so poll them tighter
+POLL_POLICIES = {
+    'default': PollPolicy(),
+    'Invoice': PollPolicy(first_delay=0.3, backoff=1.3, max_delay=1.5, deadline=60),
+    'NDA': PollPolicy(first_delay=0.3, backoff=1.3, max_delay=1.5, deadline=60),
+    'Internship Offer': PollPolicy(first_delay=0.3, backoff=1.3, max_delay=1.5, deadline=60),
+    'Contract': PollPolicy(first_delay=0.5, backoff=1.5, max_delay=2.0, deadline=90),
 }
 
 
+def get_poll_policy(doc_type=None):
+    return POLL_POLICIES.get(doc_type, POLL_POLICIES['default'])
+
+
+class PollSchedule:
+    """Tracks the waits and the deadline of one job being polled under a PollPolicy"""
+
+    def __init__(self, policy, location):
+        self.policy = policy
+        self.location = location
+        self.deadline = time.monotonic() + policy.deadline
+        self._delays = policy.delays()
+
+    def next_wait(self, retry_after=None):
+        """Seconds to wait before the next status check, Adobe's Retry-After wins over our backoff"""
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise PdfConversionTimeout(
+                f'PDF conversion still in progress after {self.policy.deadline}s: {self.location}')
+        delay = next(self._delays)
+        return min(retry_after if retry_after is not None else delay, remaining)
+
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (seconds or HTTP date) into seconds to wait"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0)
+
+
+def is_unauthorized(error):
+    """True if the error is an HTTP 401 from the Adobe API"""
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code == 401
+
+
 def make_request_with_retry(request_func, max_retries=3, initial_delay=1):
     """Helper function to retry requests on connection errors"""
     for attempt in range(max_retries):
@@ -22,17 +254,28 @@ def make_request_with_retry(request_func, max_retries=3, initial_delay=1):
         except (requests.exceptions.ConnectionError,
                 requests.exceptions.Timeout,
                 requests.exceptions.RequestException) as e:
-            if attempt == max_retries - 1:
+            # A rejected token will not start working on retry
+            if attempt == max_retries - 1 or is_unauthorized(e):
                 raise
-            delay = initial_delay * (2 ** attempt)
+            note_retry()
+            retry_after = None
+            response = getattr(e, 'response', None)
+            if response is not None and response.status_code in (429, 503):
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if response.status_code == 429:
+                    # Hold back every session, not just this request
+                    adobe_rate_limiter.throttle(retry_after, attempt)
+            delay = retry_after if retry_after is not None else jittered_backoff(attempt, initial_delay)
             time.sleep(delay)
     raise Exception("Max retries exceeded unexpectedly")
 
 
-def get_access_token(client_id, client_secret, base_url):
+def fetch_access_token(client_id, client_secret, base_url):
+    """Request a new token from Adobe, returns (access_token, expires_in seconds)"""
     def request():
-        response = requests.post(
-            url=base_url + '/token',
+        response = http_request(
+            'POST',
+            base_url + '/token',
             headers={'Content-Type': 'application/x-www-form-urlencoded'},
             data={
                 'client_id': client_id,
@@ -40,14 +283,71 @@ def get_access_token(client_id, client_secret, base_url):
             }
         )
         response.raise_for_status()
-        return response.json()['access_token']
+        data = response.json()
+        return data['access_token'], data.get('expires_in', DEFAULT_TOKEN_LIFETIME)
 
     return make_request_with_retry(request)
 
 
+class AccessTokenCache:
+    """
+    Process-wide cache for the Adobe access token.
+
+    The token is kept until TOKEN_EXPIRY_MARGIN seconds before it expires. Only one
+    thread refreshes it at a time; sessions asking during a refresh wait and reuse
+    the new token instead of calling /token themselves.
+    """
+
+    def __init__(self, expiry_margin=TOKEN_EXPIRY_MARGIN):
+        self.expiry_margin = expiry_margin
+        self._lock = threading.Lock()
+        self._tokens = {}  # (client_id, base_url) -> (access_token, expires_at)
+
+    def _valid_token(self, key):
+        entry = self._tokens.get(key)
+        if entry and time.monotonic() < entry[1]:
+            return entry[0]
+        return None
+
+    def get(self, client_id, client_secret, base_url):
+        key = (client_id, base_url)
+        token = self._valid_token(key)
+        if token:
+            return token
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            token = self._valid_token(key)
+            if token:
+                return token
+
+            token, expires_in = fetch_access_token(client_id, client_secret, base_url)
+            lifetime = max(float(expires_in) - self.expiry_margin, 0)
+            self._tokens[key] = (token, time.monotonic() + lifetime)
+            return token
+
+    def invalidate(self, access_token=None):
+        """Drop the cached token, or only the given one if it is still cached"""
+        with self._lock:
+            if access_token is None:
+                self._tokens.clear()
+                return
+            for key, (token, _) in list(self._tokens.items()):
+                if token == access_token:
+                    del self._tokens[key]
+
+
+token_cache = AccessTokenCache()
+
+
+def get_access_token(client_id, client_secret, base_url):
+    return token_cache.get(client_id, client_secret, base_url)
+
+
 def get_upload_uri(access_token, client_id, base_url):
     def request():
-        response = requests.post(
+        response = http_request(
+            'POST',
             base_url + '/assets',
             headers={
                 'Authorization': f'Bearer {access_token}',
@@ -65,11 +365,23 @@ def get_upload_uri(access_token, client_id, base_url):
     return make_request_with_retry(request)
 
 
-def upload_docx(upload_url, docx_filename):
+def upload_docx(upload_url, docx_source):
+    """
+    Stream a DOCX to the upload URI with an explicit Content-Length.
+
+    docx_source is a file path or the rendered document as bytes. The file object
+    is handed to requests, which sends it in blocks instead of loading it whole.
+    """
     def request():
-        with open(docx_filename, 'rb') as f:
-            file_size = os.path.getsize(docx_filename)
-            response = requests.put(
+        if isinstance(docx_source, (bytes, bytearray)):
+            f = io.BytesIO(docx_source)
+            file_size = len(docx_source)
+        else:
+            f = open(docx_source, 'rb')
+            file_size = os.path.getsize(docx_source)
+        with f:
+            response = http_request(
+                'PUT',
                 upload_url,
                 headers={
                     'Content-Type': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
@@ -84,7 +396,8 @@ def upload_docx(upload_url, docx_filename):
 
 def create_pdf(access_token, client_id, asset_id, base_url):
     def request():
-        response = requests.post(
+        response = http_request(
+            'POST',
             base_url + '/operation/createpdf',
             headers={
                 'Authorization': f'Bearer {access_token}',
@@ -101,41 +414,82 @@ def create_pdf(access_token, client_id, asset_id, base_url):
     return make_request_with_retry(request)
 
 
-def retrieve_pdf(access_token, client_id, location):
+def check_pdf_status(access_token, client_id, location):
+    """Poll a createpdf job once, returns (download_uri or None while in progress, retry_after)"""
+    def request():
+        response = http_request(
+            'GET',
+            location,
+            headers={
+                'Authorization': f'Bearer {access_token}',
+                'x-api-key': client_id,
+            }
+        )
+        response.raise_for_status()
+        return response.json(), parse_retry_after(response.headers.get('Retry-After'))
+
+    data, retry_after = make_request_with_retry(request)
+
+    if data['status'] == 'done':
+        return data['asset']['downloadUri'], None
+    elif data['status'] != 'in progress':
+        raise Exception(f'Unknown status: {data["status"]}')
+    return None, retry_after
+
+
+def retrieve_pdf(access_token, client_id, location, poll_policy=None):
+    schedule = PollSchedule(poll_policy or get_poll_policy(), location)
+    retry_after = None
     while True:
-        def request():
-            response = requests.get(
-                location,
-                headers={
-                    'Authorization': f'Bearer {access_token}',
-                    'x-api-key': client_id,
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        time.sleep(schedule.next_wait(retry_after))  # Wait before polling
+        download_uri, retry_after = check_pdf_status(access_token, client_id, location)
+        if download_uri:
+            return download_uri
+
+
+def download_pdf_to(download_uri, buffer, chunk_size=STREAM_CHUNK_SIZE):
+    """Stream the PDF into a writable file object chunk by chunk, returns the byte count"""
+    start = buffer.tell() if buffer.seekable() else None
 
-        data = make_request_with_retry(request)
+    def request():
+        if start is not None:
+            # Drop whatever a failed attempt already wrote
+            buffer.seek(start)
+            buffer.truncate()
+        size = 0
+        with http_request('GET', download_uri, stream=True) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                buffer.write(chunk)
+                size += len(chunk)
+        return size
 
-        if data['status'] == 'done':
-            return data['asset']['downloadUri']
-        elif data['status'] != 'in progress':
-            raise Exception(f'Unknown status: {data["status"]}')
-        time.sleep(1)  # Wait before polling again
+    return make_request_with_retry(request)
 
 
 def download_pdf(download_uri, pdf_filename):
-    def request():
-        response = requests.get(download_uri)
-        response.raise_for_status()
-        with open(pdf_filename, 'wb') as f:
-            f.write(response.content)
+    """Stream the PDF to disk, the file only appears once the download is complete"""
+    fd, tmp_filename = tempfile.mkstemp(suffix='.part', dir=os.path.dirname(os.path.abspath(pdf_filename)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            size = download_pdf_to(download_uri, f)
+        os.replace(tmp_filename, pdf_filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+    return size
 
-    make_request_with_retry(request)
+
+def download_pdf_bytes(download_uri):
+    buffer = io.BytesIO()
+    download_pdf_to(download_uri, buffer)
+    return buffer.getvalue()
 
 
 def delete_asset(access_token, client_id, asset_id, base_url):
     def request():
-        response = requests.delete(
+        response = http_request(
+            'DELETE',
             base_url + f'/assets/{asset_id}',
             headers={
                 'Authorization': f'Bearer {access_token}',
@@ -147,24 +501,331 @@ def delete_asset(access_token, client_id, asset_id, base_url):
     make_request_with_retry(request)
 
 
-def main_converter(docx_filename, output_filename):
-    if output_filename == "":
-        output_filename = os.path.splitext(docx_filename)[0] + '.pdf'
-    base_url = CONFIG['BASE_URL']
+def delete_asset_in_background(asset_id):
+    """Worker side of the deletion queue, an asset that is already gone counts as deleted"""
+    base_url, client_id, client_secret = get_credentials()
+    access_token = get_access_token(client_id, client_secret, base_url)
+    try:
+        delete_asset(access_token, client_id, asset_id, base_url)
+    except requests.exceptions.HTTPError as e:
+        if is_unauthorized(e):
+            token_cache.invalidate(access_token)
+        if e.response is None or e.response.status_code != 404:
+            raise
+
+
+# Asset cleanup is not needed for the user's document, so it runs off the critical path
+asset_deletion_queue = AssetDeletionQueue(
+    delete_asset_in_background,
+    backlog_path=os.path.join(tempfile.gettempdir(), "hvt_adobe_asset_backlog.json"),
+)
+if asset_deletion_queue.pending_count():
+    asset_deletion_queue.start()
+
+
+def get_credentials():
+    """Returns (base_url, client_id, client_secret) from the configuration"""
     client_id = CONFIG['CLIENT_ID']
     client_secret = CONFIG['CLIENT_SECRET']
 
     if client_id == UNINITIALIZED_VALUE or client_secret == UNINITIALIZED_VALUE:
         raise Exception("Client ID or Secret not set")
-
-    access_token = get_access_token(client_id, client_secret, base_url)
-    upload_url, asset_id = get_upload_uri(access_token, client_id, base_url)
-    upload_docx(upload_url, docx_filename)
-    location = create_pdf(access_token, client_id, asset_id, base_url)
-    download_uri = retrieve_pdf(access_token, client_id, location)
+    return CONFIG['BASE_URL'], client_id, client_secret
+
+
+# Outcome of one file in a convert_many batch, error is None on success
+ConversionResult = namedtuple('ConversionResult', ['docx_filename', 'pdf_filename', 'error'])
+
+
+def docx_size(docx_source):
+    if isinstance(docx_source, (bytes, bytearray)):
+        return len(docx_source)
+    return os.path.getsize(docx_source)
+
+
+def default_pdf_filename(docx_filename, output_filename=""):
+    if output_filename:
+        return output_filename
+    return os.path.splitext(docx_filename)[0] + '.pdf'
+
+
+# Conversions the async engine keeps in flight at once
+MAX_CONCURRENT_CONVERSIONS = 16
+
+
+class AsyncConverter:
+    """
+    Runs Adobe conversions on an asyncio event loop.
+
+    The blocking HTTP call of each stage runs on a thread pool shared by every job,
+    while the waits between status polls are asyncio sleeps. A job only holds a
+    thread while a request is on the wire, so dozens of conversions can be in
+    flight at once, limited by max_concurrency.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENT_CONVERSIONS, max_workers=None):
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or max_concurrency,
+                                            thread_name_prefix='adobe-convert')
+        # asyncio primitives belong to one loop, keep a semaphore per loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def run_stage(self, func, *args, timing=None):
+        """Run a blocking stage function on the converter's thread pool, retries are counted against timing"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(call_with_timing, timing, func, *args))
+
+    async def retrieve_pdf(self, access_token, client_id, location, poll_policy=None, timing=None):
+        schedule = PollSchedule(poll_policy or get_poll_policy(), location)
+        retry_after = None
+        while True:
+            await asyncio.sleep(schedule.next_wait(retry_after))
+            download_uri, retry_after = await self.run_stage(
+                check_pdf_status, access_token, client_id, location, timing=timing)
+            if timing is not None:
+                timing.polls += 1
+            if download_uri:
+                return download_uri
+
+    async def _upload(self, access_token, client_id, base_url, docx_source, doc_type):
+        """Get an upload URI and send the document, returns the new asset ID"""
+        with measure_stage('upload', doc_type) as timing:
+            upload_url, asset_id = await self.run_stage(
+                get_upload_uri, access_token, client_id, base_url, timing=timing)
+            try:
+                await self.run_stage(upload_docx, upload_url, docx_source, timing=timing)
+            except Exception:
+                asset_deletion_queue.enqueue(asset_id)
+                raise
+            timing.bytes = docx_size(docx_source)
+            return asset_id
+
+    async def _create(self, access_token, client_id, asset_id, base_url, doc_type):
+        with measure_stage('create', doc_type) as timing:
+            return await self.run_stage(create_pdf, access_token, client_id, asset_id, base_url, timing=timing)
+
+    async def _poll(self, access_token, client_id, location, doc_type):
+        with measure_stage('poll', doc_type) as timing:
+            return await self.retrieve_pdf(access_token, client_id, location, get_poll_policy(doc_type), timing)
+
+    async def _download(self, download_uri, output_filename, doc_type):
+        with measure_stage('download', doc_type) as timing:
+            if output_filename:
+                timing.bytes = await self.run_stage(download_pdf, download_uri, output_filename, timing=timing)
+                return output_filename
+            pdf_bytes = await self.run_stage(download_pdf_bytes, download_uri, timing=timing)
+            timing.bytes = len(pdf_bytes)
+            return pdf_bytes
+
+    async def _token(self, doc_type):
+        base_url, client_id, client_secret = get_credentials()
+        with measure_stage('token', doc_type) as timing:
+            access_token = await self.run_stage(
+                get_access_token, client_id, client_secret, base_url, timing=timing)
+        return access_token, client_id, base_url
+
+    async def _convert_once(self, docx_source, doc_type, output_filename=None):
+        access_token, client_id, base_url = await self._token(doc_type)
+        asset_id = None
+        try:
+            asset_id = await self._upload(access_token, client_id, base_url, docx_source, doc_type)
+            location = await self._create(access_token, client_id, asset_id, base_url, doc_type)
+            download_uri = await self._poll(access_token, client_id, location, doc_type)
+            return await self._download(download_uri, output_filename, doc_type)
+        except requests.exceptions.HTTPError as e:
+            if is_unauthorized(e):
+                token_cache.invalidate(access_token)
+            raise
+        finally:
+            if asset_id:
+                asset_deletion_queue.enqueue(asset_id)
+
+    async def convert(self, docx_source, doc_type=None, output_filename=None):
+        """
+        Convert one DOCX (a file path or bytes).
+
+        With output_filename the PDF is streamed to that file and its path returned,
+        otherwise the PDF bytes are returned and nothing touches the disk.
+        """
+        async with self._semaphore():
+            with measure_stage('total', doc_type):
+                try:
+                    return await self._convert_once(docx_source, doc_type, output_filename)
+                except requests.exceptions.HTTPError as e:
+                    if not is_unauthorized(e):
+                        raise
+                    # The cached token was revoked or expired early, retry once with a fresh one
+                    return await self._convert_once(docx_source, doc_type, output_filename)
+
+    async def convert_many(self, jobs, doc_type=None):
+        """
+        Convert [(docx_filename, pdf_filename), ...] with one shared token.
+
+        Every file is uploaded in parallel, then all createpdf operations are
+        submitted, polled together and downloaded straight to disk. A failing file
+        does not stop the batch, its error is reported in its ConversionResult.
+        """
+        jobs = [(docx, default_pdf_filename(docx, pdf)) for docx, pdf in jobs]
+        if not jobs:
+            return []
+        try:
+            access_token, client_id, base_url = await self._token(doc_type)
+        except Exception as e:
+            # No token means no file can convert, report it on each one
+            return [ConversionResult(docx, pdf, e) for docx, pdf in jobs]
+        errors = [None] * len(jobs)
+
+        async def guarded(index, coro):
+            async with self._semaphore():
+                try:
+                    return await coro
+                except Exception as e:
+                    errors[index] = e
+                    if is_unauthorized(e):
+                        token_cache.invalidate(access_token)
+                    return None
+
+        async def run_phase(make_coro, inputs):
+            """Run make_coro for every job whose previous phase succeeded"""
+            return await asyncio.gather(*(
+                guarded(i, make_coro(i, value)) if errors[i] is None else asyncio.sleep(0)
+                for i, value in enumerate(inputs)
+            ))
+
+        asset_ids = await run_phase(
+            lambda i, docx: self._upload(access_token, client_id, base_url, docx, doc_type),
+            [docx for docx, _ in jobs])
+        locations = await run_phase(
+            lambda i, asset_id: self._create(access_token, client_id, asset_id, base_url, doc_type),
+            asset_ids)
+        download_uris = await run_phase(
+            lambda i, location: self._poll(access_token, client_id, location, doc_type),
+            locations)
+        await run_phase(lambda i, uri: self._download(uri, jobs[i][1], doc_type), download_uris)
+
+        # Clean up every uploaded asset, failed conversions included
+        for asset_id in asset_ids:
+            if asset_id:
+                asset_deletion_queue.enqueue(asset_id)
+
+        return [ConversionResult(docx, pdf, error) for (docx, pdf), error in zip(jobs, errors)]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+_async_converter = None
+_async_converter_lock = threading.Lock()
+
+
+def get_async_converter():
+    global _async_converter
+    with _async_converter_lock:
+        if _async_converter is None:
+            _async_converter = AsyncConverter()
+        return _async_converter
+
+
+def set_max_concurrency(max_concurrency):
+    """Replace the shared engine with one allowing max_concurrency conversions in flight"""
+    global _async_converter, MAX_CONCURRENT_CONVERSIONS
+    with _async_converter_lock:
+        MAX_CONCURRENT_CONVERSIONS = max_concurrency
+        old_converter, _async_converter = _async_converter, AsyncConverter(max_concurrency)
+    if old_converter is not None:
+        old_converter.close()
+
+
+async def convert(docx_source, doc_type=None, output_filename=None):
+    """Convert a DOCX to PDF on the running event loop, returns the PDF bytes unless output_filename is given"""
+    return await get_async_converter().convert(docx_source, doc_type, output_filename)
+
+
+# Identical renders (e.g. Streamlit reruns) are served from here without calling Adobe
+conversion_cache = PdfConversionCache()
+
+
+async def convert_many_async(jobs, doc_type=None, use_cache=True):
+    jobs = [(docx, default_pdf_filename(docx, pdf)) for docx, pdf in jobs]
+    if not use_cache:
+        return await get_async_converter().convert_many(jobs, doc_type)
+
+    results = [None] * len(jobs)
+    pending = []
+    for index, (docx, pdf) in enumerate(jobs):
+        try:
+            key = docx_content_hash(docx)
+        except Exception:
+            # Unreadable files still go through the batch so their error is reported
+            pending.append((index, None))
+            continue
+        cached_path = conversion_cache.get(key)
+        if cached_path:
+            try:
+                shutil.copyfile(cached_path, pdf)
+                results[index] = ConversionResult(docx, pdf, None)
+                continue
+            except OSError as e:
+                # Evicted since get() or the output is not writable, convert it like a miss
+                print(f"⚠️ Could not copy cached PDF for {docx}: {e}")
+        pending.append((index, key))
+
+    if not pending:
+        return results
+    converted = await get_async_converter().convert_many([jobs[index] for index, _ in pending], doc_type)
+    for (index, key), result in zip(pending, converted):
+        if result.error is None and key:
+            conversion_cache.put(key, result.pdf_filename)
+        results[index] = result
+    return results
+
+
+def convert_many(jobs, doc_type=None, use_cache=True):
+    """Convert [(docx_filename, pdf_filename), ...] in one batch, returns a ConversionResult per file"""
+    results = run_sync(convert_many_async(jobs, doc_type, use_cache))
+    failed = [result for result in results if result.error is not None]
+    print(f"Converted {len(results) - len(failed)}/{len(results)} PDFs")
+    for result in failed:
+        print(f"❌ Failed to convert {result.docx_filename}: {result.error}")
+    return results
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code such as a Streamlit script"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Already inside an event loop, run on a helper thread instead of nesting loops
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+def main_converter(docx_filename, output_filename, doc_type=None, use_cache=True):
+    output_filename = default_pdf_filename(docx_filename, output_filename)
     pdf_filename = output_filename
-    download_pdf(download_uri, pdf_filename)
-    delete_asset(access_token, client_id, asset_id, base_url)
+
+    cache_key = docx_content_hash(docx_filename) if use_cache else None
+    cached_path = conversion_cache.get(cache_key) if use_cache else None
+    if cached_path:
+        try:
+            shutil.copyfile(cached_path, pdf_filename)
+            print(f"PDF served from conversion cache: {pdf_filename}")
+            return
+        except OSError as e:
+            # Evicted since get() or the output is not writable, convert it like a miss
+            print(f"⚠️ Could not copy cached PDF for {docx_filename}: {e}")
+
+    run_sync(convert(docx_filename, doc_type, output_filename=pdf_filename))
+    if use_cache:
+        conversion_cache.put(cache_key, pdf_filename)
     print(f"PDF generated successfully: {pdf_filename}")
 
 
@@ -0,0 +1,260 @@
+import copy
+import io
+import posixpath
+import shutil
+import struct
+import zipfile
+
+from lxml import etree
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+W_P = f"{{{W_NS}}}p"
+W_R = f"{{{W_NS}}}r"
+W_RPR = f"{{{W_NS}}}rPr"
+W_T = f"{{{W_NS}}}t"
+W_BR = f"{{{W_NS}}}br"
+W_CR = f"{{{W_NS}}}cr"
+W_TAB = f"{{{W_NS}}}tab"
+W_PTAB = f"{{{W_NS}}}ptab"
+W_NO_BREAK_HYPHEN = f"{{{W_NS}}}noBreakHyphen"
+W_TYPE = f"{{{W_NS}}}type"
+W_BODY = f"{{{W_NS}}}body"
+W_TBL = f"{{{W_NS}}}tbl"
+W_TR = f"{{{W_NS}}}tr"
+W_TC = f"{{{W_NS}}}tc"
+W_HEADER_REFERENCE = f"{{{W_NS}}}headerReference"
+W_FOOTER_REFERENCE = f"{{{W_NS}}}footerReference"
+R_ID = f"{{{R_NS}}}id"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+OFFICE_DOCUMENT_REL = "/officeDocument"
+HEADER_FOOTER_RELS = ("/header", "/footer")
+
+# Zip general purpose flags, see APPNOTE.TXT 4.4.4
+ZIP_ENCRYPTED = 0x01
+ZIP_DATA_DESCRIPTOR = 0x08
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def run_text(r):
+    """Text of a w:r element, the same string python-docx's Run.text returns"""
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or "")
+        elif tag == W_BR:
+            # Page and column breaks have no text equivalent
+            parts.append("\n" if child.get(W_TYPE, "textWrapping") == "textWrapping" else "")
+        elif tag == W_CR:
+            parts.append("\n")
+        elif tag == W_NO_BREAK_HYPHEN:
+            parts.append("-")
+        elif tag in (W_TAB, W_PTAB):
+            parts.append("\t")
+    return "".join(parts)
+
+
+def set_run_text(r, text):
+    """Replace a w:r element's content with text, as python-docx's Run.text setter does"""
+    for child in list(r):
+        if isinstance(child.tag, str) and child.tag != W_RPR:
+            r.remove(child)
+
+    buffer = []
+
+    def flush():
+        if buffer:
+            value = "".join(buffer)
+            t = etree.SubElement(r, W_T)
+            t.text = value
+            if len(value.strip()) < len(value):
+                t.set(XML_SPACE, "preserve")
+            buffer.clear()
+
+    for char in text:
+        if char == "\t":
+            flush()
+            etree.SubElement(r, W_TAB)
+        elif char in "\r\n":
+            flush()
+            etree.SubElement(r, W_BR)
+        else:
+            buffer.append(char)
+    flush()
+
+
+def paragraph_runs(p):
+    return [child for child in p if child.tag == W_R]
+
+
+def replace_across_runs(p, engine):
+    """
+    Placeholders may span runs: the joined text of all runs is substituted and
+    written to the first run, the others are emptied. Paragraphs without a
+    placeholder are not touched.
+    """
+    runs = paragraph_runs(p)
+    if not runs:
+        return False
+    text, count = engine.substitute("".join(run_text(r) for r in runs))
+    if not count:
+        return False
+    for r in runs:
+        set_run_text(r, "")
+    set_run_text(runs[0], text)
+    return True
+
+
+def replace_in_runs(p, substitute):
+    """Substitute each run's text on its own, only runs whose text changes are rewritten"""
+    changed = False
+    for r in paragraph_runs(p):
+        text = run_text(r)
+        new_text = substitute(text)
+        if new_text != text:
+            set_run_text(r, new_text)
+            changed = True
+    return changed
+
+
+def is_top_level_paragraph(p):
+    """A body paragraph or one in a cell of a top-level table, what Document.paragraphs and .tables reach"""
+    parent = p.getparent()
+    if parent is None:
+        return False
+    if parent.tag == W_BODY:
+        return True
+    if parent.tag != W_TC:
+        return False
+    tr = parent.getparent()
+    tbl = tr.getparent() if tr is not None and tr.tag == W_TR else None
+    body = tbl.getparent() if tbl is not None and tbl.tag == W_TBL else None
+    return body is not None and body.tag == W_BODY
+
+
+def relationships(docx_zip, part_name):
+    """(type, resolved part name) of every internal relationship of a part"""
+    rels_name = posixpath.join(posixpath.dirname(part_name), "_rels", posixpath.basename(part_name) + ".rels")
+    try:
+        root = etree.fromstring(docx_zip.read(rels_name))
+    except KeyError:
+        return {}
+    rels = {}
+    for rel in root.iter(f"{{{PACKAGE_REL_NS}}}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(part_name), target))
+        rels[rel.get("Id")] = (rel.get("Type", ""), target)
+    return rels
+
+
+def main_document_part(docx_zip):
+    for rel_type, target in relationships(docx_zip, "").values():
+        if rel_type.endswith(OFFICE_DOCUMENT_REL):
+            return target
+    return "word/document.xml"
+
+
+def render_part(data, process_paragraph, select=None, references=None):
+    """
+    Stream-parse one XML part and hand every w:p to process_paragraph as soon
+    as its closing tag is read. Returns the serialized part, or None when no
+    paragraph changed so the original bytes can be kept.
+    """
+    tags = [W_P]
+    if references is not None:
+        tags += [W_HEADER_REFERENCE, W_FOOTER_REFERENCE]
+    # Same parser options as python-docx, so a rewritten part serializes the same way
+    events = etree.iterparse(io.BytesIO(data), events=("end",), tag=tags,
+                             remove_blank_text=True, resolve_entities=False)
+    changed = False
+    for _, element in events:
+        if element.tag == W_P:
+            if (select is None or select(element)) and process_paragraph(element):
+                changed = True
+        else:
+            references.append(element.get(R_ID))
+    if not changed:
+        return None
+    return etree.tostring(events.root, encoding="UTF-8", standalone=True)
+
+
+def copy_raw_member(source, target, info):
+    """
+    Append a member's compressed bytes to target as they are, keeping its CRC
+    and sizes, so an unchanged member is neither inflated nor deflated again.
+    Encrypted and ZIP64 members go through zipfile's own copy.
+    """
+    if (info.flag_bits & ZIP_ENCRYPTED or info.file_size > zipfile.ZIP64_LIMIT
+            or info.compress_size > zipfile.ZIP64_LIMIT):
+        with source.open(info) as member, target.open(copy.copy(info), "w") as out:
+            shutil.copyfileobj(member, out)
+        return
+
+    # The data starts after the member's local header, whose name and extra
+    # field lengths may differ from the central directory entry
+    source.fp.seek(info.header_offset)
+    header = source.fp.read(zipfile.sizeFileHeader)
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    source.fp.seek(name_length + extra_length, io.SEEK_CUR)
+
+    target_info = copy.copy(info)
+    # CRC and sizes are known up front, so they go in the local header
+    target_info.flag_bits &= ~ZIP_DATA_DESCRIPTOR
+    target.fp.seek(target.start_dir)
+    target_info.header_offset = target.fp.tell()
+    target.fp.write(target_info.FileHeader(zip64=False))
+    remaining = info.compress_size
+    while remaining:
+        chunk = source.fp.read(min(remaining, COPY_CHUNK_SIZE))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated zip member {info.filename}")
+        target.fp.write(chunk)
+        remaining -= len(chunk)
+
+    target.filelist.append(target_info)
+    target.NameToInfo[target_info.filename] = target_info
+    target.start_dir = target.fp.tell()
+    target._didModify = True
+
+
+def render_docx(input_path, output_path, process_paragraph, headers_and_footers=True, select=None):
+    """
+    Rewrite paragraphs directly in the package XML without building python-docx
+    objects. The main document part and, optionally, every header and footer a
+    section references are parsed; members with nothing to replace, and all
+    other zip members, are copied byte for byte without recompressing.
+    """
+    with zipfile.ZipFile(input_path) as source:
+        document_part = main_document_part(source)
+        references = [] if headers_and_footers else None
+        rendered = {}
+        data = render_part(source.read(document_part), process_paragraph, select, references)
+        if data is not None:
+            rendered[document_part] = data
+
+        if headers_and_footers:
+            rels = relationships(source, document_part)
+            for rel_id in dict.fromkeys(references):
+                rel_type, part_name = rels.get(rel_id, ("", None))
+                if part_name is None or not rel_type.endswith(HEADER_FOOTER_RELS) or part_name in rendered:
+                    continue
+                data = render_part(source.read(part_name), process_paragraph, select)
+                if data is not None:
+                    rendered[part_name] = data
+
+        with zipfile.ZipFile(output_path, "w") as target:
+            for info in source.infolist():
+                if info.filename in rendered:
+                    target.writestr(copy.copy(info), rendered[info.filename])
+                else:
+                    copy_raw_member(source, target, info)
+    return list(rendered)
@@ -0,0 +1,124 @@
+import copy
+import io
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+
+from docxtpl import DocxTemplate
+
+
+class CachedTemplate:
+    def __init__(self, key, data, template):
+        self.key = key
+        self.data = data
+        self.template = template
+        self.renders = 0
+        # Uncompressed size of the package, a rough measure of the parsed XML held in memory
+        with zipfile.ZipFile(io.BytesIO(data)) as docx_zip:
+            self.parsed_bytes = sum(info.file_size for info in docx_zip.infolist())
+
+
+class DocxTemplateCache:
+    """
+    Parsed DocxTemplates kept in memory so the zip and XML parse happens once
+    per template version instead of once per render.
+
+    Entries are keyed by the template's absolute path and revalidated against
+    its size and mtime, so a file replaced by the template store is parsed
+    again. Every get() hands out an independent copy: a deep copy of the
+    parsed document, or a fresh parse of the cached bytes if copying fails.
+    Least recently used templates are evicted beyond max_entries or max_bytes
+    of uncompressed package data.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # abs path -> CachedTemplate
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, path, key):
+        with open(path, "rb") as f:
+            data = f.read()
+        template = DocxTemplate(io.BytesIO(data))
+        template.init_docx()
+        return CachedTemplate(key, data, template)
+
+    def _entry(self, input_path):
+        path = os.path.abspath(input_path)
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.key == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                entry.renders += 1
+                return entry
+
+        # Parse outside the lock, a duplicate parse of the same file is harmless
+        entry = self._load(path, key)
+        with self._lock:
+            self.misses += 1
+            entry.renders += 1
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            self._evict()
+        return entry
+
+    def get(self, input_path):
+        """A DocxTemplate for input_path that is safe to render and save"""
+        entry = self._entry(input_path)
+        template = DocxTemplate(io.BytesIO(entry.data))
+        try:
+            template.docx = copy.deepcopy(entry.template.docx)
+        except Exception as e:
+            print(f"⚠️ Could not copy cached template {input_path}, parsing it again: {e}")
+            template.init_docx()
+        return template
+
+    def preload(self, input_path):
+        """Parse a template into the cache without rendering it"""
+        self._entry(input_path)
+
+    def _evict(self):
+        """Must be called with the lock held"""
+        total = sum(entry.parsed_bytes for entry in self._entries.values())
+        while self._entries and (len(self._entries) > self.max_entries or total > self.max_bytes):
+            if len(self._entries) == 1:
+                break
+            _, entry = self._entries.popitem(last=False)
+            total -= entry.parsed_bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def memory_report(self):
+        """Entry count, cached file bytes and uncompressed package bytes, overall and per template"""
+        with self._lock:
+            templates = [
+                {
+                    "path": path,
+                    "file_bytes": len(entry.data),
+                    "parsed_bytes": entry.parsed_bytes,
+                    "renders": entry.renders,
+                }
+                for path, entry in self._entries.items()
+            ]
+            return {
+                "entries": len(templates),
+                "file_bytes": sum(t["file_bytes"] for t in templates),
+                "parsed_bytes": sum(t["parsed_bytes"] for t in templates),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "templates": templates,
+            }
+
+
+docx_template_cache = DocxTemplateCache()
@@ -3,30 +3,30 @@ from docx.shared import Pt
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 import re
 
+from docx_stream_render import is_top_level_paragraph, render_docx, replace_in_runs
 
-def replace_docx_placeholders(input_path, output_path, replacements):
+PLACEHOLDER_PATTERN = re.compile(r'(_[^_]+_)')
 
-    doc = Document(input_path)
 
-    patterns = {
-        "_Internship_Duration_": re.compile(r'(_Internship_Duration_)'),
-        "_First_Pay_Cheque_Date": re.compile(r'(_First_Pay_Cheque_Date)'),
-        "standard": re.compile(r'(_[^_]+_)')
-    }
+def substitute_run_text(text, replacements):
+    """Placeholders are replaced within a single run, they are not joined across runs"""
+    for ph in ["_Internship_Duration_", "_First_Pay_Cheque_Date"]:
+        if ph in replacements and ph in text:
+            text = text.replace(ph, replacements[ph])
 
-    def process_run(run):
-        text = run.text
+    matches = PLACEHOLDER_PATTERN.findall(text)
+    for match in matches:
+        if match in replacements:
+            text = text.replace(match, replacements[match])
+    return text
 
-        for ph in ["_Internship_Duration_", "_First_Pay_Cheque_Date"]:
-            if ph in replacements and ph in text:
-                text = text.replace(ph, replacements[ph])
 
-        matches = patterns["standard"].findall(text)
-        for match in matches:
-            if match in replacements:
-                text = text.replace(match, replacements[match])
+def replace_with_document_model(input_path, output_path, replacements):
+    """The same replacement through python-docx's Document, used if the streaming renderer fails"""
+    doc = Document(input_path)
 
-        run.text = text
+    def process_run(run):
+        run.text = substitute_run_text(run.text, replacements)
 
     for paragraph in doc.paragraphs:
 
@@ -44,6 +44,17 @@ def replace_docx_placeholders(input_path, output_path, replacements):
                         process_run(run)
 
     doc.save(output_path)
+
+
+def replace_docx_placeholders(input_path, output_path, replacements):
+    """Body paragraphs and top-level table cells; headers, footers and nested tables are left as they are"""
+    try:
+        render_docx(input_path, output_path,
+                    lambda p: replace_in_runs(p, lambda text: substitute_run_text(text, replacements)),
+                    headers_and_footers=False, select=is_top_level_paragraph)
+    except Exception as e:
+        print(f"⚠️ Streaming render of {input_path} failed, using python-docx: {e}")
+        replace_with_document_model(input_path, output_path, replacements)
     print(f"Document with preserved formatting saved to {output_path}")
 
 
@@ -63,8 +63,6 @@
 # invoice_edit("try_invoice_2_page_1.docx", "modified_invoice_2.docx", context)
 
 
-from docxtpl import DocxTemplate
-from jinja2 import Environment
 from docx import Document
 from docx.shared import Pt, Inches
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT, WD_TAB_ALIGNMENT, WD_TAB_LEADER
@@ -142,20 +140,83 @@ def add_bold_line(paragraph, length=None, boldness=True, font_size=15):
 #     doc.save(output_path)
 #     print("Payment details section added.")
 
+import functools
+import io
+
 from docx import Document
 from docx.shared import Pt, RGBColor
 from docx.oxml.ns import qn
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
-def add_footer_to_docx(doc_path, y_offset_mm=15):
+
+class DocumentPipeline:
+    """
+    Post-processing transforms applied in order to one in-memory python-docx
+    Document, which is loaded at most once and serialized once at the end.
+
+    A transform is any callable taking the Document; use functools.partial to
+    give it options, e.g. functools.partial(apply_footer, y_offset_mm=10).
+    """
+
+    def __init__(self, transforms=None):
+        self.transforms = list(transforms or [])
+
+    def add(self, transform):
+        self.transforms.append(transform)
+        return self
+
+    def apply(self, doc):
+        for transform in self.transforms:
+            transform(doc)
+        return doc
+
+    def run(self, source, output_path=None):
+        """
+        source is a path, a file object or an already loaded Document. Saves to
+        output_path, or returns the DOCX bytes when output_path is None.
+        """
+        doc = source if hasattr(source, "element") else Document(source)
+        self.apply(doc)
+        return save_document(doc, output_path)
+
+
+def save_document(doc, output_path=None):
+    """Save a Document or DocxTemplate to output_path, or return the DOCX bytes when output_path is None"""
+    if output_path is not None:
+        doc.save(output_path)
+        return output_path
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def rendered_document(template):
+    """
+    The python-docx Document of a rendered DocxTemplate, safe to post-process.
+
+    docxtpl swaps the rendered header and footer parts into the relationships
+    without updating python-docx's rId lookup, so footer edits would land on
+    the unrendered part. The lookup is refreshed here.
+    """
+    rels = template.docx.part.rels
+    target_parts = getattr(rels, "_target_parts_by_rId", None)
+    if target_parts is None:
+        # Different python-docx internals, go through one save and load instead
+        return Document(io.BytesIO(save_document(template)))
+    for rId, rel in rels.items():
+        if not rel.is_external:
+            target_parts[rId] = rel.target_part
+    return template.docx
+
+
+def apply_footer(doc, y_offset_mm=15):
     """
     Adds a two-row left/right aligned footer with an adjustable vertical offset.
 
     Args:
-        doc_path (str): Path to the .docx file.
+        doc (Document): Document to change in place.
         y_offset_mm (float): Distance from bottom of page to footer, in millimeters.
     """
-    doc = Document(doc_path)
     section = doc.sections[0]
     footer = section.footer
 
@@ -199,7 +260,10 @@ def add_footer_to_docx(doc_path, y_offset_mm=15):
     create_footer_line("+1 (469) 214-6349", "www.hvtechnologies.app", RGBColor(0, 102, 204))  # Blue link
     create_footer_line("+91-9773603818", "hardik@hvtechnologies.app")  # Black
 
-    doc.save(doc_path)
+
+def add_footer_to_docx(doc_path, y_offset_mm=15):
+    """Adds the two-row footer to a .docx file on disk, see apply_footer."""
+    DocumentPipeline([functools.partial(apply_footer, y_offset_mm=y_offset_mm)]).run(doc_path, doc_path)
     print(f"Footer added to {doc_path} with y-offset: {y_offset_mm}mm")
 
 
@@ -222,12 +286,8 @@ def set_footer(doc):
         right_para = right_cell.paragraphs[0]
         right_para.text = "+91-8588099741\t\thardik@hvtechnologies.app"
 
-def add_payment_details_section(output_path, line_length=None, line_bold=True, line_font_size=15):
-    doc = Document(output_path)
-
-    # Add footer to every page
-    set_footer(doc)
-
+def apply_payment_details(doc, line_length=None, line_bold=True, line_font_size=15):
+    """Payment Details block between two bold lines, appended to the body"""
     doc.add_paragraph()  # Add space before the top line
 
     # First bold line
@@ -270,6 +330,9 @@ def add_payment_details_section(output_path, line_length=None, line_bold=True, l
     bottom_line = doc.add_paragraph()
     add_bold_line(bottom_line, length=line_length, boldness=line_bold, font_size=line_font_size)
 
+
+def apply_terms(doc):
+    """Terms and Conditions list appended to the body"""
     # Space before T&Cs
     doc.add_paragraph()
     doc.add_paragraph()
@@ -291,7 +354,19 @@ def add_payment_details_section(output_path, line_length=None, line_bold=True, l
         term_run = para.add_run(term)
         term_run.font.size = Pt(11)
 
-    doc.save(output_path)
+
+def payment_details_pipeline(line_length=None, line_bold=True, line_font_size=15):
+    """Table footer on every page, payment details and terms, in that order"""
+    return DocumentPipeline([
+        set_footer,
+        functools.partial(apply_payment_details, line_length=line_length, line_bold=line_bold,
+                          line_font_size=line_font_size),
+        apply_terms,
+    ])
+
+
+def add_payment_details_section(output_path, line_length=None, line_bold=True, line_font_size=15):
+    payment_details_pipeline(line_length, line_bold, line_font_size).run(output_path, output_path)
     print("Payment details and terms section added with footer.")
 
 
@@ -309,16 +384,26 @@ def add_payment_details_section(output_path, line_length=None, line_bold=True, l
 #     print(f"{output_path} has been created!")
 
 
-from docxtpl import DocxTemplate
-from jinja2 import Environment
 from num2words import num2words  # ✅ Import number-to-words converter
+from docx_template_cache import docx_template_cache
+from template_environment import CachedTemplateEnvironment
 
 def sum_filter(values):
     return sum(values)
 
-def invoice_edit(input_path, output_path, context):
+# Shared by every invoice render, compiled templates are reused across calls.
+# Registered as sum_filter so Jinja's builtin sum filter keeps working.
+invoice_environment = CachedTemplateEnvironment("invoice")
+invoice_environment.filters['sum_filter'] = sum_filter
+
+def invoice_edit(input_path, output_path, context, post_process=None):
+    """
+    Render an invoice template. post_process, a DocumentPipeline or a list of
+    transforms, runs on the rendered document before the single save. Returns
+    the DOCX bytes when output_path is None.
+    """
     import re
-    doc = DocxTemplate(input_path)
+    doc = docx_template_cache.get(input_path)
 
     # Sum payment_description prices
     # total_price = 0
@@ -343,12 +428,18 @@ def invoice_edit(input_path, output_path, context):
     # context["sum_to_word"] = num2words(total_price, to="cardinal", lang="en").title()  # e.g. "Fifty Thousand"
 
     # Render
-    jinja_env = Environment()
-    # jinja_env.filters['sum'] = sum_filter
-    doc.render(context, jinja_env)
-    doc.save(output_path)
-
-    print(f"{output_path} has been created!")
+    doc.render(context, invoice_environment)
+
+    if post_process is not None:
+        pipeline = post_process if isinstance(post_process, DocumentPipeline) else DocumentPipeline(post_process)
+        document = pipeline.apply(rendered_document(doc))
+        if document is not doc.docx:
+            doc = document
+    # A DocxTemplate saves through its own pre/post processing
+    result = save_document(doc, output_path)
+
+    print(f"{output_path or 'Invoice'} has been created!")
+    return result
 
 
 
@@ -0,0 +1,86 @@
+"""
+UNO side of the LibreOffice pool. Needs a Python that can import uno, which is
+LibreOffice's bundled one or a system python3 with python3-uno, not the app's
+virtualenv.
+
+libreoffice_pool imports it directly when uno is importable in the app. Otherwise
+each worker runs this file as a long-lived helper under the UNO Python:
+
+    python libreoffice_bridge.py <port> <connect timeout>
+
+It connects to the worker's soffice on port, prints {"ready": true}, then reads
+one JSON job {"docx": ..., "pdf": ...} per line on stdin and answers each with
+{"ok": true} or {"error": "..."} on stdout.
+"""
+import json
+import os
+import sys
+import time
+
+import uno
+from com.sun.star.beans import PropertyValue
+
+
+def uno_property(name, value):
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+def connect_desktop(port, timeout, is_running=None):
+    """Desktop of the soffice listening on port, retrying until it accepts or timeout passes"""
+    local_context = uno.getComponentContext()
+    resolver = local_context.ServiceManager.createInstanceWithContext(
+        "com.sun.star.bridge.UnoUrlResolver", local_context)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            context = resolver.resolve(f"uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext")
+            return context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+        except Exception:
+            if (is_running is not None and not is_running()) or time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def convert_document(desktop, docx_filename, pdf_filename):
+    document = desktop.loadComponentFromURL(
+        uno.systemPathToFileUrl(os.path.abspath(docx_filename)), "_blank", 0,
+        (uno_property("Hidden", True),))
+    if document is None:
+        raise RuntimeError(f"LibreOffice could not open {docx_filename}")
+    try:
+        document.storeToURL(
+            uno.systemPathToFileUrl(os.path.abspath(pdf_filename)),
+            (uno_property("FilterName", "writer_pdf_Export"),))
+    finally:
+        document.close(True)
+
+
+def reply(message):
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def main():
+    port, timeout = int(sys.argv[1]), float(sys.argv[2])
+    try:
+        desktop = connect_desktop(port, timeout)
+    except Exception as e:
+        reply({"error": f"could not connect to LibreOffice: {e}"})
+        return 1
+    reply({"ready": True})
+
+    for line in sys.stdin:
+        try:
+            job = json.loads(line)
+            convert_document(desktop, job["docx"], job["pdf"])
+            reply({"ok": True})
+        except Exception as e:
+            reply({"error": str(e)})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
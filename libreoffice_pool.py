@@ -0,0 +1,363 @@
+import json
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+
+from rate_limit import jittered_backoff
+
+try:
+    # Only when the app itself runs under a Python with the UNO bridge
+    import libreoffice_bridge as uno_bridge
+except ImportError:
+    uno_bridge = None
+
+BRIDGE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "libreoffice_bridge.py")
+
+# Worker modes, see LibreOfficeWorker
+MODE_UNO = "uno"
+MODE_BRIDGE = "bridge"
+MODE_SUBPROCESS = "subprocess"
+
+
+class LibreOfficeError(Exception):
+    pass
+
+
+def find_soffice():
+    return shutil.which("soffice") or shutil.which("libreoffice")
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def find_uno_python(soffice_path):
+    """
+    A Python interpreter that can import uno: LIBREOFFICE_PYTHON, the one
+    bundled next to soffice, or the system python3 (python3-uno). None if
+    there is none.
+    """
+    program_dir = os.path.dirname(os.path.realpath(soffice_path))
+    candidates = [
+        os.environ.get("LIBREOFFICE_PYTHON"),
+        os.path.join(program_dir, "python"),
+        os.path.join(program_dir, "python.exe"),
+        # The system interpreter, not the app's virtualenv one that is first on PATH
+        "/usr/bin/python3",
+        shutil.which("python3"),
+    ]
+    for candidate in dict.fromkeys(c for c in candidates if c):
+        if not os.path.isfile(candidate):
+            continue
+        try:
+            result = subprocess.run([candidate, "-c", "import uno"], stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL, timeout=15)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if result.returncode == 0:
+            return candidate
+    return None
+
+
+class LibreOfficeWorker:
+    """
+    One pre-started headless LibreOffice with its own user profile.
+
+    mode is one of
+      - "uno": the app can import uno, the office process stays running and
+        every job is a load/export over its socket from this process.
+      - "bridge": the office process stays running and a helper running
+        libreoffice_bridge.py under LibreOffice's Python does the load/export,
+        jobs go to it over a pipe. Used when uno is not importable in the app.
+      - "subprocess": no UNO Python was found. Each job starts a fresh
+        `soffice --convert-to pdf`, nothing stays warm beyond the initialized
+        profile, so expect seconds per document rather than sub-second.
+
+    In the warm modes a job that exceeds job_timeout kills the office process
+    and raises, the pool then restarts the worker.
+    """
+
+    def __init__(self, soffice_path, index, start_timeout=60, job_timeout=120, mode=MODE_SUBPROCESS,
+                 uno_python=None):
+        self.soffice_path = soffice_path
+        self.index = index
+        self.start_timeout = start_timeout
+        self.job_timeout = job_timeout
+        self.mode = mode
+        self.uno_python = uno_python
+        self.jobs_done = 0
+        self.process = None
+        self.desktop = None
+        self.bridge = None
+        self._replies = None
+        self.profile_dir = tempfile.mkdtemp(prefix=f"hvt_libreoffice_{index}_")
+
+    @property
+    def profile_url(self):
+        return "file://" + self.profile_dir
+
+    def _base_command(self):
+        return [
+            self.soffice_path,
+            f"-env:UserInstallation={self.profile_url}",
+            "--headless", "--invisible", "--nologo", "--nodefault", "--norestore", "--nolockcheck",
+        ]
+
+    def start(self):
+        self.jobs_done = 0
+        if self.mode == MODE_SUBPROCESS:
+            # Convert an empty document once so the profile exists before the first real job
+            warmup_dir = tempfile.mkdtemp(prefix="hvt_libreoffice_warmup_")
+            try:
+                warmup_file = os.path.join(warmup_dir, "warmup.txt")
+                with open(warmup_file, "w") as f:
+                    f.write("warmup")
+                self._convert_with_subprocess(warmup_file, os.path.join(warmup_dir, "warmup.pdf"))
+            finally:
+                shutil.rmtree(warmup_dir, ignore_errors=True)
+            return
+
+        port = free_port()
+        self.process = subprocess.Popen(
+            self._base_command() + [f"--accept=socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            if self.mode == MODE_UNO:
+                self.desktop = uno_bridge.connect_desktop(
+                    port, self.start_timeout, is_running=lambda: self.process.poll() is None)
+            else:
+                self._start_bridge(port)
+        except Exception as e:
+            self.kill()
+            raise LibreOfficeError(f"LibreOffice worker {self.index} failed to start: {e}")
+
+    def _start_bridge(self, port):
+        self.bridge = subprocess.Popen(
+            [self.uno_python, BRIDGE_SCRIPT, str(port), str(self.start_timeout)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        # Replies are read on a thread so every wait can have a timeout
+        self._replies = queue.Queue()
+        threading.Thread(target=self._read_replies, args=(self.bridge, self._replies), daemon=True).start()
+        message = self._reply(self.start_timeout + 5)
+        if not message.get("ready"):
+            raise LibreOfficeError(message.get("error", "bridge did not start"))
+
+    @staticmethod
+    def _read_replies(bridge, replies):
+        for line in bridge.stdout:
+            try:
+                replies.put(json.loads(line))
+            except ValueError:
+                continue
+        replies.put({"error": "LibreOffice bridge exited"})
+
+    def _reply(self, timeout):
+        try:
+            return self._replies.get(timeout=timeout)
+        except queue.Empty:
+            self.kill()
+            raise LibreOfficeError(f"LibreOffice worker {self.index} did not answer within {timeout}s")
+
+    def _convert_with_subprocess(self, docx_filename, pdf_filename):
+        out_dir = tempfile.mkdtemp(prefix="hvt_libreoffice_out_")
+        try:
+            result = subprocess.run(
+                self._base_command() + ["--convert-to", "pdf", "--outdir", out_dir, docx_filename],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                timeout=self.job_timeout,
+            )
+            produced = os.path.join(out_dir, os.path.splitext(os.path.basename(docx_filename))[0] + ".pdf")
+            if result.returncode != 0 or not os.path.exists(produced):
+                raise LibreOfficeError(f"LibreOffice could not convert {docx_filename}: "
+                                       f"{result.stderr.decode('utf-8', 'replace').strip()}")
+            shutil.move(produced, pdf_filename)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    def _convert_with_uno(self, docx_filename, pdf_filename):
+        """The UNO calls block, so they run on a thread and a stuck one is cut off by killing the office"""
+        outcome = {}
+
+        def run():
+            try:
+                uno_bridge.convert_document(self.desktop, docx_filename, pdf_filename)
+            except Exception as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(self.job_timeout)
+        if thread.is_alive():
+            self.kill()
+            raise LibreOfficeError(f"LibreOffice timed out after {self.job_timeout}s converting {docx_filename}")
+        if "error" in outcome:
+            raise LibreOfficeError(f"LibreOffice could not convert {docx_filename}: {outcome['error']}")
+
+    def _convert_with_bridge(self, docx_filename, pdf_filename):
+        job = {"docx": os.path.abspath(docx_filename), "pdf": os.path.abspath(pdf_filename)}
+        try:
+            self.bridge.stdin.write(json.dumps(job) + "\n")
+            self.bridge.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise LibreOfficeError(f"LibreOffice bridge is gone: {e}")
+        message = self._reply(self.job_timeout)
+        if not message.get("ok"):
+            raise LibreOfficeError(f"LibreOffice could not convert {docx_filename}: {message.get('error')}")
+
+    def convert(self, docx_filename, pdf_filename):
+        if self.mode == MODE_UNO:
+            self._convert_with_uno(docx_filename, pdf_filename)
+        elif self.mode == MODE_BRIDGE:
+            self._convert_with_bridge(docx_filename, pdf_filename)
+        else:
+            self._convert_with_subprocess(docx_filename, pdf_filename)
+        self.jobs_done += 1
+
+    def kill(self):
+        """Stop immediately, for a worker that is stuck or failed to start"""
+        for process in (self.bridge, self.process):
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+        self.bridge = None
+        self.process = None
+        self.desktop = None
+
+    def stop(self):
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.bridge is not None:
+            try:
+                # The helper exits when its stdin closes, then the office is asked to quit
+                self.bridge.stdin.close()
+                self.bridge.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self.bridge.kill()
+            self.bridge = None
+        if self.process is not None:
+            if self.mode == MODE_BRIDGE and self.process.poll() is None:
+                self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def close(self):
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class LibreOfficePool:
+    """
+    Pool of warm LibreOffice workers, one per CPU by default.
+
+    Jobs are handed to whichever worker is idle. A worker is restarted after
+    max_jobs_per_worker conversions, or after a failed or timed out one, to
+    keep memory growth and stuck documents from piling up. A restart that
+    fails is retried with backoff until it succeeds or the pool is closed.
+    """
+
+    def __init__(self, size=None, max_jobs_per_worker=100, soffice_path=None, start_timeout=60, job_timeout=120,
+                 max_restart_delay=60):
+        self.soffice_path = soffice_path or find_soffice()
+        if not self.soffice_path:
+            raise LibreOfficeError("LibreOffice (soffice) is not installed")
+        self.size = size or os.cpu_count() or 1
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_restart_delay = max_restart_delay
+        self._closed = threading.Event()
+        self._idle = queue.Queue()
+
+        uno_python = None
+        if uno_bridge is not None:
+            self.mode = MODE_UNO
+        else:
+            uno_python = find_uno_python(self.soffice_path)
+            self.mode = MODE_BRIDGE if uno_python else MODE_SUBPROCESS
+        if self.mode == MODE_SUBPROCESS:
+            print("⚠️ No Python with LibreOffice's uno module found (install python3-uno or set "
+                  "LIBREOFFICE_PYTHON), the LibreOffice pool is not warm: every job starts a new soffice")
+        else:
+            print(f"📄 LibreOffice pool of {self.size} warm workers ({self.mode} mode)")
+
+        self._workers = [
+            LibreOfficeWorker(self.soffice_path, index, start_timeout, job_timeout, self.mode, uno_python)
+            for index in range(self.size)
+        ]
+
+        # Start the workers in parallel, each one joins the idle queue once it is up
+        for worker in self._workers:
+            threading.Thread(target=self._start_worker, args=(worker,), daemon=True).start()
+
+    @property
+    def warm(self):
+        return self.mode != MODE_SUBPROCESS
+
+    def _start_worker(self, worker):
+        attempt = 0
+        while not self._closed.is_set():
+            try:
+                worker.start()
+            except Exception as e:
+                delay = max(1.0, jittered_backoff(attempt, initial_delay=2, max_delay=self.max_restart_delay))
+                print(f"❌ LibreOffice worker {worker.index} failed to start, retrying in {delay:.0f}s: {e}")
+                attempt += 1
+                self._closed.wait(delay)
+                continue
+            if self._closed.is_set():
+                worker.stop()
+            else:
+                self._idle.put(worker)
+            return
+
+    def convert(self, docx_filename, pdf_filename, timeout=120):
+        """Convert on the next idle worker, waiting at most timeout seconds for one"""
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise LibreOfficeError("No LibreOffice worker became available")
+
+        recycle = False
+        try:
+            worker.convert(docx_filename, pdf_filename)
+        except Exception:
+            recycle = True
+            raise
+        finally:
+            if recycle or worker.jobs_done >= self.max_jobs_per_worker:
+                # Restart off the request path, the worker rejoins the queue when ready
+                threading.Thread(target=self._recycle_worker, args=(worker,), daemon=True).start()
+            else:
+                self._idle.put(worker)
+
+    def _recycle_worker(self, worker):
+        worker.stop()
+        self._start_worker(worker)
+
+    def close(self):
+        self._closed.set()
+        for worker in self._workers:
+            worker.close()
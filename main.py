@@ -11,7 +11,9 @@ import tempfile
 import pdfplumber
 from apscheduler.schedulers.background import BackgroundScheduler
 from manage_internship_roles_tab import manage_internship_roles_tab
-from docx_pdf_converter import main_converter
+from pdf_converters import get_pdf_converter
+from template_listeners import start_template_watcher
+from template_warmup import start_template_warmup, template_warmup_progress
 
 load_dotenv()
 
@@ -106,6 +108,10 @@ scheduler = BackgroundScheduler()
 scheduler.add_job(cleanup_broken_metadata, 'cron', hour=2)
 scheduler.start()
 
+# Keep template metadata and caches current from Firestore, and warm them up in the background (once per process)
+start_template_watcher(firestore_db)
+start_template_warmup(firestore_db, bucket)
+
 # Initialize session state
 if 'user' not in st.session_state:
     st.session_state.user = None
@@ -181,6 +187,19 @@ if selected_option == "Admin Panel":
         # Admin dashboard
         st.success(f"Welcome Admin! ({st.session_state.user['email']})")
 
+        warmup = template_warmup_progress()
+        if warmup:
+            with st.expander(f"🔥 Template warm-up: {warmup['state']}", expanded=warmup["state"] == "running"):
+                total = warmup["total"] or 1
+                st.progress(min(warmup["done"] / total, 1.0))
+                st.write(f"{warmup['done']} of {warmup['total']} steps done, {warmup['failed']} failed")
+                if warmup["current"]:
+                    st.caption(f"Working on: {warmup['current']}")
+                if warmup["started_at"] and warmup["finished_at"]:
+                    st.caption(f"Took {warmup['finished_at'] - warmup['started_at']:.1f}s")
+                for error in warmup["errors"]:
+                    st.warning(error)
+
         # Admin panel content
         st.header("📁 Template Management")
         st.subheader("Upload New Templates")
@@ -666,8 +685,9 @@ elif selected_option == "History" and st.session_state.get('is_admin', False):
                                     elif tmp_path.endswith('.docx'):
                                         with tempfile.NamedTemporaryFile(suffix="pdf", delete=False) as pdf_tmp_file:
                                             pdf_tmp_path = pdf_tmp_file.name
-                                            main_converter(tmp_path, pdf_tmp_path)
-                                            pdf_view(pdf_tmp_file)
+                                        # The converter replaces the file, so preview it by path, not the old handle
+                                        get_pdf_converter().convert(tmp_path, pdf_tmp_path)
+                                        pdf_view(pdf_tmp_path)
                                 else:
                                     st.error("Downloaded file not found!")
 
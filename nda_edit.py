@@ -1,11 +1,12 @@
-from docxtpl import DocxTemplate
+from docx_template_cache import docx_template_cache
+from template_environment import template_environment
 
 
 def nda_edit(input_path, output_path, context):
-    # Load the template
-    doc = DocxTemplate(input_path)
+    # Copy of the cached parsed template
+    doc = docx_template_cache.get(input_path)
     # Render the template
-    doc.render(context)
+    doc.render(context, template_environment)
 
     # Save the filled document
     doc.save(output_path)
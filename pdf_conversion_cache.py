@@ -0,0 +1,130 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+
+# docProps/core.xml gets a fresh created/modified stamp on some saves, drop it before hashing
+CORE_PROPS_TIMESTAMP = re.compile(rb'<dcterms:(created|modified)\b[^>]*>[^<]*</dcterms:\1>')
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "hvt_pdf_cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def docx_content_hash(docx_path):
+    """
+    Hash the rendered content of a DOCX file.
+
+    Only member names and their (normalized) bytes are hashed, in name order, so
+    the zip entry timestamps and member order of two identical renders don't matter.
+    """
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(docx_path) as docx_zip:
+        for name in sorted(docx_zip.namelist()):
+            data = docx_zip.read(name)
+            if name == "docProps/core.xml":
+                data = CORE_PROPS_TIMESTAMP.sub(b"", data)
+            digest.update(name.encode("utf-8"))
+            digest.update(len(data).to_bytes(8, "big"))
+            digest.update(data)
+    return digest.hexdigest()
+
+
+class PdfConversionCache:
+    """
+    Size-bounded on-disk cache of converted PDFs keyed by the DOCX content hash.
+
+    Entries are plain files named <hash>.pdf. The file mtime is when the entry was
+    stored (used for the optional TTL) and the atime is bumped on every hit, so the
+    least recently used entries are evicted first once max_bytes is exceeded.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, ttl=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _is_expired(self, stat):
+        return self.ttl is not None and time.time() - stat.st_mtime > self.ttl
+
+    def get(self, key):
+        """Return the path of the cached PDF for key, or None on a miss"""
+        path = self._path(key)
+        with self._lock:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+
+            if self._is_expired(stat):
+                os.remove(path)
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            os.utime(path, (time.time(), stat.st_mtime))
+            self.hits += 1
+            return path
+
+    def put(self, key, pdf_path):
+        """Store a copy of pdf_path under key and evict old entries if over budget"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(pdf_path, tmp_path)
+        with self._lock:
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pdf"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((path, os.stat(path)))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(stat.st_size for _, stat in entries)
+        for path, stat in sorted(entries, key=lambda entry: entry[1].st_atime):
+            if total <= self.max_bytes and not self._is_expired(stat):
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= stat.st_size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for path, _ in self._entries():
+                os.remove(path)
+
+    def stats(self):
+        with self._lock:
+            entries = self._entries()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "bytes": sum(stat.st_size for _, stat in entries),
+                "max_bytes": self.max_bytes,
+            }
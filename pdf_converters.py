@@ -0,0 +1,91 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from docx_pdf_converter import ConversionResult, convert_many, main_converter
+
+# Used when neither PDF_CONVERTER_BACKEND nor st.secrets["converter"]["BACKEND"] is set
+DEFAULT_BACKEND = "adobe"
+
+
+class PdfConverter:
+    """A DOCX to PDF backend, handlers only call convert()"""
+
+    name = None
+
+    def convert(self, docx_filename, pdf_filename, doc_type=None):
+        raise NotImplementedError
+
+    def convert_one(self, docx_filename, pdf_filename, doc_type=None):
+        """convert() that returns a ConversionResult instead of raising"""
+        try:
+            self.convert(docx_filename, pdf_filename, doc_type=doc_type)
+            return ConversionResult(docx_filename, pdf_filename, None)
+        except Exception as e:
+            return ConversionResult(docx_filename, pdf_filename, e)
+
+    def convert_many(self, jobs, doc_type=None):
+        """Convert [(docx_filename, pdf_filename), ...], returns a ConversionResult per file"""
+        return [self.convert_one(docx_filename, pdf_filename, doc_type) for docx_filename, pdf_filename in jobs]
+
+
+class AdobeConverter(PdfConverter):
+    name = "adobe"
+
+    def convert(self, docx_filename, pdf_filename, doc_type=None):
+        main_converter(docx_filename, pdf_filename, doc_type=doc_type)
+
+    def convert_many(self, jobs, doc_type=None):
+        # One batch shares a token and overlaps the uploads, polls and downloads
+        return convert_many(jobs, doc_type=doc_type)
+
+
+class LibreOfficeConverter(PdfConverter):
+    """Converts locally on a pool of headless LibreOffice workers, kept warm when a UNO Python is available"""
+
+    name = "libreoffice"
+
+    def __init__(self, pool_size=None, max_jobs_per_worker=100):
+        # Imported here so the Adobe backend works on machines without LibreOffice
+        from libreoffice_pool import LibreOfficePool
+        self.pool = LibreOfficePool(size=pool_size, max_jobs_per_worker=max_jobs_per_worker)
+
+    def convert(self, docx_filename, pdf_filename, doc_type=None):
+        self.pool.convert(docx_filename, pdf_filename)
+        print(f"PDF generated successfully: {pdf_filename}")
+
+    def convert_many(self, jobs, doc_type=None):
+        # Keep every worker in the pool busy
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            futures = [executor.submit(self.convert_one, docx, pdf, doc_type) for docx, pdf in jobs]
+            return [future.result() for future in futures]
+
+
+BACKENDS = {
+    AdobeConverter.name: AdobeConverter,
+    LibreOfficeConverter.name: LibreOfficeConverter,
+}
+
+_converters = {}
+_converters_lock = threading.Lock()
+
+
+def configured_backend():
+    backend = os.environ.get("PDF_CONVERTER_BACKEND")
+    if not backend:
+        try:
+            backend = st.secrets["converter"]["BACKEND"]
+        except Exception:
+            backend = DEFAULT_BACKEND
+    return backend.lower()
+
+
+def get_pdf_converter(backend=None):
+    """Shared converter for the configured backend, created once per process"""
+    backend = backend or configured_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF converter backend: {backend}")
+    with _converters_lock:
+        if backend not in _converters:
+            _converters[backend] = BACKENDS[backend]()
+        return _converters[backend]
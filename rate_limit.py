@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Process-wide token bucket, refilled at rate tokens per second up to capacity.
+
+    pause() stops handing out tokens until a given time, so one 429 holds back
+    every caller instead of each session discovering the limit on its own.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.max_waiting = 0
+        self.total_wait = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available, returns the seconds spent waiting"""
+        start = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now >= self._paused_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        waited = now - start
+                        self.total_wait += waited
+                        return waited
+                    if now < self._paused_until:
+                        sleep_for = self._paused_until - now
+                    else:
+                        sleep_for = (1 - self._tokens) / self.rate
+                # A little jitter so sleepers don't all wake on the same tick
+                time.sleep(sleep_for + random.uniform(0, sleep_for * 0.1))
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class ConcurrencyGovernor:
+    """Caps how many requests are in flight at once and tracks how many are queued for a slot"""
+
+    def __init__(self, max_concurrent):
+        self.max_concurrent = max_concurrent
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        self._semaphore.acquire()
+        with self._lock:
+            self.waiting -= 1
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+        return False
+
+
+def jittered_backoff(attempt, initial_delay=1, max_delay=30):
+    """Full jitter: a random wait up to the exponential delay, so retries from many sessions spread out"""
+    return random.uniform(0, min(max_delay, initial_delay * (2 ** attempt)))
+
+
+class RateLimiter:
+    """Token bucket plus concurrency governor guarding every outbound request to one service"""
+
+    def __init__(self, rate=10, burst=20, max_concurrent=8):
+        self.bucket = TokenBucket(rate, burst)
+        self.governor = ConcurrencyGovernor(max_concurrent)
+        self.throttled = 0
+
+    def slot(self):
+        """Wait for a token, then hold a concurrency slot for the duration of the with block"""
+        self.bucket.acquire()
+        return self.governor
+
+    def throttle(self, retry_after=None, attempt=0):
+        """Called on a 429, pauses every caller for retry_after or a jittered backoff"""
+        self.throttled += 1
+        self.bucket.pause(retry_after if retry_after is not None else jittered_backoff(attempt))
+
+    def stats(self):
+        return {
+            "rate": self.bucket.rate,
+            "burst": self.bucket.capacity,
+            "max_concurrent": self.governor.max_concurrent,
+            "in_flight": self.governor.in_flight,
+            "queued_for_token": self.bucket.waiting,
+            "queued_for_slot": self.governor.waiting,
+            "max_queued_for_token": self.bucket.max_waiting,
+            "max_queued_for_slot": self.governor.max_waiting,
+            "total_token_wait": self.bucket.total_wait,
+            "throttled": self.throttled,
+        }
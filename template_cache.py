@@ -0,0 +1,180 @@
+import functools
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from template_registry import template_registry
+from template_store import blob_listing, download_in_parallel, template_store
+
+PROPOSAL_SECTIONS = {
+    "cover_page": "Cover Page",
+    "table_of_contents": "Table of Contents",
+    "business_requirement": "Business Requirement",
+    "page_3_6": "Page 3 to 6",
+    "testimonials": "Testimonials"
+}
+PROPOSAL_STORAGE_PREFIX = "hvt_generator/Proposal/"
+
+
+def proposal_filename(data, document_id):
+    filename = data.get("original_name", document_id)
+    if not filename.lower().endswith(".pdf"):
+        filename += ".pdf"
+    return filename
+
+
+def proposal_template_details(data, section_key, document_id, local_path):
+    return {
+        "name": data.get("name"),
+        "original_name": data.get("original_name"),
+        "doc_type": data.get("doc_type", "Proposal"),
+        "file_type": data.get("file_type"),
+        "size_kb": data.get("size_kb"),
+        "size_bytes": data.get("size_bytes"),
+        "upload_date": data.get("upload_date"),
+        "upload_timestamp": data.get("upload_timestamp"),
+        "download_url": data.get("download_url"),
+        "storage_path": data.get("storage_path"),
+        "visibility": data.get("visibility"),
+        "description": data.get("description"),
+        "order_number": data.get("order_number"),
+        "is_active": data.get("is_active", True),
+        "template_part": data.get("template_part"),
+        "proposal_section_type": data.get("proposal_section_type", section_key),
+        "pdf_name": data.get("pdf_name"),
+        "num_pages": data.get("num_pages"),
+        "section_key": section_key,
+        "document_id": document_id,
+        "local_path": local_path
+    }
+
+
+class ProposalTemplateCache:
+    """
+    Proposal template PDFs shared by every rerun and session in the process.
+
+    Files live in one persistent directory per section and are keyed by
+    storage_path plus blob generation. Once ttl seconds have passed the next
+    get() revalidates with the section documents and the shared bucket listing,
+    and only downloads templates that are new or whose generation changed. The
+    blobs themselves come from the persistent template store and are linked
+    into the section directories, so a restart does not download them again.
+    While the snapshot listeners keep the template registry current the section
+    documents are read from it instead of Firestore.
+    """
+
+    def __init__(self, cache_dir=None, ttl=300, store=None, registry=None, listing=None):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "hvt_template_cache", "proposal")
+        self.ttl = ttl
+        self.store = store or template_store
+        self.registry = registry or template_registry
+        self.listing = listing or blob_listing
+        self._lock = threading.Lock()
+        self._versions = {}  # local_path -> (storage_path, version)
+        self._folder_paths = {}
+        self._templates = []
+        self._checked_at = None
+
+    def get(self, firestore_db, bucket, force=False):
+        """Returns (folder_paths, templates) like fetch_and_prepare_proposal_templates"""
+        with self._lock:
+            if force or self._checked_at is None or time.monotonic() - self._checked_at > self.ttl:
+                self._refresh(firestore_db, bucket)
+            return dict(self._folder_paths), [dict(tpl) for tpl in self._templates]
+
+    def invalidate(self):
+        """Revalidate on the next get()"""
+        with self._lock:
+            self._checked_at = None
+
+    def _section_documents(self, firestore_db, section_key):
+        """(doc_id, data) pairs for a section, from the registry while its listeners are live"""
+        if self.registry.is_live() and self.registry.is_ready("Proposal", section_key):
+            return self.registry.documents("Proposal", section_key)
+        templates_ref = firestore_db.collection("hvt_generator").document("Proposal").collection(section_key)
+        return [(doc.id, doc.to_dict()) for doc in templates_ref.stream()]
+
+    def _materialize(self, bucket, storage_path, target_path, version):
+        """Link the store's copy into the section directory, copying if links are not supported"""
+        source = self.store.fetch(bucket, storage_path, version)
+        part_path = target_path + ".part"
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        try:
+            os.link(source, part_path)
+        except OSError:
+            shutil.copyfile(source, part_path)
+        os.replace(part_path, target_path)
+        return self.store.version(storage_path)
+
+    def _refresh(self, firestore_db, bucket):
+        versions = self.listing.versions(bucket, PROPOSAL_STORAGE_PREFIX)
+        folder_paths = {}
+        section_docs = {}
+        pending = {}  # target_path -> storage_path
+        tasks = []
+
+        for section_key in PROPOSAL_SECTIONS:
+            target_dir = os.path.join(self.cache_dir, section_key)
+            os.makedirs(target_dir, exist_ok=True)
+            folder_paths[section_key] = target_dir
+
+            try:
+                docs = []
+                for document_id, data in self._section_documents(firestore_db, section_key):
+                    if not data or not data.get("storage_path"):
+                        continue
+
+                    storage_path = data["storage_path"]
+                    target_path = os.path.join(target_dir, proposal_filename(data, document_id))
+                    version = versions.get(storage_path)
+                    docs.append((document_id, data, target_path))
+                    if (version is None or self._versions.get(target_path) != (storage_path, version)
+                            or not os.path.isfile(target_path)):
+                        pending[target_path] = storage_path
+                        tasks.append((target_path, functools.partial(
+                            self._materialize, bucket, storage_path, target_path, version)))
+                section_docs[section_key] = docs
+            except Exception as e:
+                print(f"⚠️ Failed to fetch templates from section {section_key}: {e}")
+
+        results, failures = download_in_parallel(tasks)
+        for target_path, version in results.items():
+            storage_path = pending[target_path]
+            self._versions[target_path] = (storage_path, version or versions.get(storage_path))
+
+        templates = []
+        for section_key in PROPOSAL_SECTIONS:
+            if section_key in section_docs:
+                section_templates = [
+                    proposal_template_details(data, section_key, document_id, target_path)
+                    for document_id, data, target_path in section_docs[section_key]
+                    if target_path not in failures
+                ]
+            else:
+                # Keep serving what this section had last time rather than nothing
+                section_templates = [tpl for tpl in self._templates if tpl["section_key"] == section_key]
+            templates.extend(section_templates)
+
+        self._remove_stale(folder_paths, {tpl["local_path"] for tpl in templates})
+        self._folder_paths = folder_paths
+        self._templates = templates
+        self._checked_at = time.monotonic()
+        print(f"✅ Proposal templates checked: {len(templates)} cached, {len(results)} updated, {len(failures)} failed")
+
+    def _remove_stale(self, folder_paths, kept):
+        """Delete files whose template is gone, page_3_6 lists its whole directory"""
+        for target_dir in folder_paths.values():
+            for filename in os.listdir(target_dir):
+                path = os.path.join(target_dir, filename)
+                if path not in kept and os.path.isfile(path):
+                    try:
+                        os.remove(path)
+                    except OSError as e:
+                        print(f"⚠️ Could not remove stale template {path}: {e}")
+                    self._versions.pop(path, None)
+
+
+proposal_template_cache = ProposalTemplateCache()
@@ -0,0 +1,75 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from jinja2 import Environment, FileSystemBytecodeCache
+
+
+class CachedTemplateEnvironment(Environment):
+    """
+    A Jinja environment meant to be created once per module and shared by
+    every docxtpl render.
+
+    docxtpl compiles each part's XML with from_string on every render. Here the
+    compiled Template is memoized by a hash of that source, so a template
+    version is compiled once per process. The compiled code is also written to
+    a bytecode cache on disk, where a restarted app or a bulk render worker
+    finds it.
+    """
+
+    def __init__(self, name="default", max_templates=64, bytecode_dir=None, **options):
+        bytecode_dir = bytecode_dir or os.path.join(tempfile.gettempdir(), "hvt_jinja_bytecode", name)
+        os.makedirs(bytecode_dir, exist_ok=True)
+        super().__init__(bytecode_cache=FileSystemBytecodeCache(bytecode_dir), **options)
+        self.max_templates = max_templates
+        self._compiled_lock = threading.Lock()
+        self._compiled = OrderedDict()  # source hash -> Template
+        self.compile_hits = 0
+        self.compile_misses = 0
+
+    def from_string(self, source, globals=None, template_class=None):
+        if not isinstance(source, str) or globals or template_class:
+            return super().from_string(source, globals, template_class)
+
+        key = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        with self._compiled_lock:
+            template = self._compiled.get(key)
+            if template is not None:
+                self._compiled.move_to_end(key)
+                self.compile_hits += 1
+                return template
+
+        # Compile outside the lock, a duplicate compile of the same source is harmless
+        template = self.template_class.from_code(self, self._code(key, source), self.make_globals(None), None)
+        with self._compiled_lock:
+            self.compile_misses += 1
+            self._compiled[key] = template
+            while len(self._compiled) > self.max_templates:
+                self._compiled.popitem(last=False)
+        return template
+
+    def _code(self, key, source):
+        """Compiled code for source, from the bytecode cache when it has it"""
+        bucket = self.bytecode_cache.get_bucket(self, key, None, source)
+        if bucket.code is not None:
+            return bucket.code
+        code = self.compile(source)
+        bucket.code = code
+        try:
+            self.bytecode_cache.set_bucket(bucket)
+        except OSError as e:
+            print(f"⚠️ Could not write Jinja bytecode cache: {e}")
+        return code
+
+    def stats(self):
+        with self._compiled_lock:
+            return {
+                "templates": len(self._compiled),
+                "hits": self.compile_hits,
+                "misses": self.compile_misses,
+            }
+
+
+template_environment = CachedTemplateEnvironment()
@@ -0,0 +1,142 @@
+import functools
+import threading
+import time
+
+from template_cache import proposal_template_cache
+from template_registry import PROPOSAL_SECTION_KEYS, REGISTRY_TTL, TEMPLATE_DOC_TYPES, template_registry
+from template_store import blob_listing, template_store
+
+# Seconds between attempts to start the listeners after a failure
+WATCHER_RETRY_INTERVAL = 60
+
+
+class TemplateWatcher:
+    """
+    Firestore snapshot listeners on every hvt_generator/<doc type>/templates
+    collection and the five proposal section subcollections.
+
+    Each change is applied to the in-memory template registry. When a document is
+    edited or deleted its stored blob is revalidated or dropped, any change
+    invalidates the bucket listing, and a change to a proposal section
+    invalidates the proposal cache, so nothing on the generation path has to
+    poll Firestore to notice an admin's upload.
+    """
+
+    def __init__(self, firestore_db, registry=None, store=None, proposal_cache=None, listing=None):
+        self.firestore_db = firestore_db
+        self.registry = registry or template_registry
+        self.store = store or template_store
+        self.proposal_cache = proposal_cache or proposal_template_cache
+        self.listing = listing or blob_listing
+        self._watches = []
+        self._seen = set()  # collections whose first snapshot has arrived
+
+    def collections(self):
+        for doc_type in TEMPLATE_DOC_TYPES:
+            yield doc_type, "templates"
+        for section_key in PROPOSAL_SECTION_KEYS:
+            yield "Proposal", section_key
+
+    def start(self):
+        for doc_type, collection in self.collections():
+            ref = self.firestore_db.collection("hvt_generator").document(doc_type).collection(collection)
+            callback = functools.partial(self._on_snapshot, doc_type, collection)
+            self._watches.append(ref.on_snapshot(callback))
+        self.registry.watcher = self
+        print(f"👂 Watching {len(self._watches)} template collections")
+
+    def stop(self):
+        if self.registry.watcher is self:
+            self.registry.watcher = None
+        for watch in self._watches:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                print(f"⚠️ Could not stop template listener: {e}")
+        self._watches = []
+
+    def alive(self):
+        """False once any listener stream has closed, after which changes are no longer delivered"""
+        return bool(self._watches) and all(getattr(watch, "is_active", True) for watch in self._watches)
+
+    def ready(self):
+        return all(key in self._seen for key in self.collections())
+
+    def _on_snapshot(self, doc_type, collection, snapshot, changes, read_time):
+        """Runs on the Firestore listener thread"""
+        initial = (doc_type, collection) not in self._seen
+        try:
+            if initial:
+                # The first snapshot is the whole collection, it also drops documents
+                # deleted while no listener was running
+                self.registry.replace(doc_type, collection, {doc.id: doc.to_dict() or {} for doc in snapshot})
+                changes = []
+            for change in changes:
+                doc = change.document
+                if change.type.name == "REMOVED":
+                    previous = self.registry.remove(doc_type, collection, doc.id)
+                    self._forget_blob(previous, None)
+                else:
+                    data = doc.to_dict() or {}
+                    previous = self.registry.apply(doc_type, collection, doc.id, data)
+                    if change.type.name == "MODIFIED":
+                        self._forget_blob(previous, data)
+        except Exception as e:
+            print(f"⚠️ Failed to apply template changes for {doc_type}/{collection}: {e}")
+        self.registry.mark_ready(doc_type, collection)
+        self._seen.add((doc_type, collection))
+
+        # The first snapshot only replays what is already there
+        if changes and not initial:
+            # An upload or delete changes the blobs as well as the metadata
+            self.listing.invalidate()
+            if doc_type == "Proposal":
+                self.proposal_cache.invalidate()
+
+    def _forget_blob(self, previous, current):
+        old_path = previous.get("storage_path") if previous else None
+        if not old_path:
+            return
+        if current and current.get("storage_path") == old_path:
+            self.store.invalidate(old_path)
+        else:
+            self.store.discard(old_path)
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+_last_attempt = None
+
+
+def start_template_watcher(firestore_db):
+    """
+    Start the listeners once per process, later calls (every Streamlit rerun)
+    return the same watcher. A watcher whose streams have closed is replaced,
+    and a failed start is retried at most every WATCHER_RETRY_INTERVAL seconds.
+    Meanwhile load_template_registry reloads the registry from Firestore.
+    """
+    global _watcher, _last_attempt
+    with _watcher_lock:
+        if _watcher is not None and _watcher.alive():
+            return _watcher
+        if _last_attempt is not None and time.monotonic() - _last_attempt < WATCHER_RETRY_INTERVAL:
+            return None
+        _last_attempt = time.monotonic()
+
+        if _watcher is not None:
+            print("⚠️ Template listeners stopped, restarting them")
+            _watcher.stop()
+            _watcher = None
+            # Uploads made while nobody was listening invalidated nothing
+            blob_listing.invalidate()
+            proposal_template_cache.invalidate()
+        watcher = TemplateWatcher(firestore_db)
+        try:
+            watcher.start()
+        except Exception as e:
+            watcher.stop()
+            print(f"⚠️ Template listeners unavailable, reloading the template registry from Firestore "
+                  f"every {REGISTRY_TTL}s instead: {e}")
+            return None
+        _watcher = watcher
+        return _watcher
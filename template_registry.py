@@ -0,0 +1,204 @@
+import threading
+import time
+
+TEMPLATE_DOC_TYPES = ["Internship Offer", "NDA", "Invoice", "Contract", "Proposal"]
+DOCX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PROPOSAL_SECTION_KEYS = ["cover_page", "table_of_contents", "business_requirement", "page_3_6", "testimonials"]
+
+# Fields with a secondary index for find()
+INDEXED_FIELDS = ("visibility", "file_type", "num_pages")
+
+# Seconds a loaded registry is trusted while no snapshot listener keeps it current
+REGISTRY_TTL = 60
+
+
+def order_key(item):
+    """Same order as order_by("order_number"), ties broken by document id like Firestore"""
+    doc_id, data = item
+    return data["order_number"], doc_id
+
+
+class TemplateRegistry:
+    """
+    In-memory copy of the template metadata documents under hvt_generator,
+    keyed by (doc_type, collection) where collection is "templates" or a
+    proposal section key.
+
+    Loaded with collection group queries and kept current by the snapshot
+    listeners. Without live listeners load_template_registry reloads it once
+    it is older than REGISTRY_TTL. Every change rebuilds the derived views of its collection (the
+    order_number ordering, the first public DOCX and the per-field indexes), so
+    the lookups the handlers make are dictionary reads with no network I/O.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collections = {}  # (doc_type, collection) -> {doc_id: data}
+        self._ordered = {}  # (doc_type, collection) -> [(doc_id, data)] by order_number
+        self._first_public_docx = {}  # (doc_type, collection) -> (doc_id, data)
+        self._by_field = {}  # (doc_type, collection, field, value) -> {doc_id}
+        self._ready = set()
+        self.watcher = None  # TemplateWatcher feeding this registry, set while it runs
+
+    def is_live(self):
+        """True while snapshot listeners are streaming changes into the registry"""
+        watcher = self.watcher
+        return watcher is not None and watcher.alive()
+
+    def _rebuild(self, key):
+        """Recompute the derived views of one collection, must be called with the lock held"""
+        documents = self._collections.get(key, {})
+        ordered = sorted(
+            ((doc_id, data) for doc_id, data in documents.items() if data.get("order_number") is not None),
+            key=order_key,
+        )
+        self._ordered[key] = ordered
+        self._first_public_docx.pop(key, None)
+        for doc_id, data in ordered:
+            if data.get("visibility") == "Public" and data.get("file_type") == DOCX_MIME_TYPE and data.get("storage_path"):
+                self._first_public_docx[key] = (doc_id, data)
+                break
+
+        for index_key in [k for k in self._by_field if k[:2] == key]:
+            del self._by_field[index_key]
+        for doc_id, data in documents.items():
+            for field in INDEXED_FIELDS:
+                self._by_field.setdefault(key + (field, data.get(field)), set()).add(doc_id)
+
+    def apply(self, doc_type, collection, doc_id, data):
+        """Store a document, returns the data it replaced or None"""
+        with self._lock:
+            documents = self._collections.setdefault((doc_type, collection), {})
+            previous = documents.get(doc_id)
+            documents[doc_id] = data
+            self._rebuild((doc_type, collection))
+            return previous
+
+    def remove(self, doc_type, collection, doc_id):
+        with self._lock:
+            previous = self._collections.get((doc_type, collection), {}).pop(doc_id, None)
+            self._rebuild((doc_type, collection))
+            return previous
+
+    def replace(self, doc_type, collection, documents):
+        """Swap in the full contents of a collection, {doc_id: data}"""
+        with self._lock:
+            self._collections[(doc_type, collection)] = dict(documents)
+            self._rebuild((doc_type, collection))
+
+    def mark_ready(self, doc_type, collection):
+        """Called once a collection's documents have been loaded"""
+        with self._lock:
+            self._collections.setdefault((doc_type, collection), {})
+            self._ready.add((doc_type, collection))
+
+    def is_ready(self, doc_type, collection="templates"):
+        with self._lock:
+            return (doc_type, collection) in self._ready
+
+    def documents(self, doc_type, collection="templates"):
+        """(doc_id, data) pairs in document id order, the same order a Firestore stream returns"""
+        with self._lock:
+            documents = self._collections.get((doc_type, collection), {})
+            return [(doc_id, dict(documents[doc_id])) for doc_id in sorted(documents)]
+
+    def ordered(self, doc_type, collection="templates"):
+        """(doc_id, data) pairs that have an order_number, in order_by("order_number") order"""
+        with self._lock:
+            return [(doc_id, dict(data)) for doc_id, data in self._ordered.get((doc_type, collection), [])]
+
+    def first_template(self, doc_type, collection="templates"):
+        """Data of the template with the lowest order_number, or None"""
+        with self._lock:
+            ordered = self._ordered.get((doc_type, collection))
+            return dict(ordered[0][1]) if ordered else None
+
+    def first_public_docx(self, doc_type, collection="templates"):
+        """Data of the lowest ordered public DOCX template with a storage path, or None"""
+        with self._lock:
+            found = self._first_public_docx.get((doc_type, collection))
+            return dict(found[1]) if found else None
+
+    def find(self, doc_type, collection="templates", **filters):
+        """(doc_id, data) pairs matching every filter on visibility, file_type or num_pages, in document id order"""
+        with self._lock:
+            documents = self._collections.get((doc_type, collection), {})
+            matches = None
+            for field, value in filters.items():
+                if field not in INDEXED_FIELDS:
+                    raise ValueError(f"{field} is not an indexed template field")
+                ids = self._by_field.get((doc_type, collection, field, value), set())
+                matches = ids if matches is None else matches & ids
+            ids = documents.keys() if matches is None else matches
+            return [(doc_id, dict(documents[doc_id])) for doc_id in sorted(ids)]
+
+    def load(self, firestore_db, replace=False):
+        """
+        Fill the registry with one collection group query per collection name.
+        With replace the query results overwrite the collections, so documents
+        deleted since the last load disappear.
+        """
+        collections = {}
+        for collection in ["templates"] + PROPOSAL_SECTION_KEYS:
+            for doc in firestore_db.collection_group(collection).stream():
+                type_ref = doc.reference.parent.parent
+                if type_ref is None or type_ref.parent.id != "hvt_generator":
+                    continue
+                collections.setdefault((type_ref.id, collection), {})[doc.id] = doc.to_dict() or {}
+
+        # Collections with no documents still count as loaded
+        for doc_type in TEMPLATE_DOC_TYPES:
+            collections.setdefault((doc_type, "templates"), {})
+        for section_key in PROPOSAL_SECTION_KEYS:
+            collections.setdefault(("Proposal", section_key), {})
+
+        with self._lock:
+            for key, documents in collections.items():
+                if replace:
+                    self._collections[key] = documents
+                else:
+                    # Listener updates that arrived first are newer than the query results
+                    self._collections[key] = dict(documents, **self._collections.get(key, {}))
+                self._rebuild(key)
+                self._ready.add(key)
+        print(f"✅ Template registry loaded {sum(len(d) for d in collections.values())} templates")
+
+    def clear(self):
+        with self._lock:
+            self._collections.clear()
+            self._ordered.clear()
+            self._first_public_docx.clear()
+            self._by_field.clear()
+            self._ready.clear()
+
+
+template_registry = TemplateRegistry()
+_load_lock = threading.Lock()
+_loaded_at = None
+
+
+def load_template_registry(firestore_db, ttl=REGISTRY_TTL):
+    """
+    Load the registry on first use. While the snapshot listeners are live later
+    calls return it without touching Firestore; otherwise it is reloaded from
+    Firestore once it is older than ttl seconds.
+    """
+    global _loaded_at
+
+    def stale():
+        return (_loaded_at is None
+                or (not template_registry.is_live() and time.monotonic() - _loaded_at >= ttl))
+
+    if stale():
+        with _load_lock:
+            if stale():
+                first_load = _loaded_at is None
+                try:
+                    template_registry.load(firestore_db, replace=not first_load)
+                except Exception as e:
+                    if first_load:
+                        raise
+                    print(f"⚠️ Could not reload the template registry, keeping the last loaded copy: {e}")
+                # A failed reload is retried after another ttl, not on every call
+                _loaded_at = time.monotonic()
+    return template_registry
@@ -0,0 +1,301 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from template_registry import TEMPLATE_DOC_TYPES
+
+# Upper bound on concurrent blob downloads when fetching many templates at once
+TEMPLATE_DOWNLOAD_WORKERS = 8
+
+# Where the admin upload puts templates, generated documents under hvt_generator/generated/ are not listed
+TEMPLATE_STORAGE_PREFIXES = [
+    f"hvt_generator/{doc_type.lower().replace(' ', '_')}/templates/"
+    for doc_type in TEMPLATE_DOC_TYPES if doc_type != "Proposal"
+] + ["hvt_generator/Proposal/"]
+
+
+def blob_version(blob):
+    """Generation changes on every overwrite, md5 is the fallback when it is missing"""
+    return blob.generation or blob.md5_hash
+
+
+def download_in_parallel(tasks, max_workers=TEMPLATE_DOWNLOAD_WORKERS):
+    """
+    Run (target_path, func) download tasks on a bounded thread pool. Returns
+    (results, failures), both keyed by target_path, every failure is printed.
+    """
+    results = {}
+    failures = {}
+    if not tasks:
+        return results, failures
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks)), thread_name_prefix="template-download") as pool:
+        futures = {pool.submit(func): target_path for target_path, func in tasks}
+        for future in as_completed(futures):
+            target_path = futures[future]
+            try:
+                results[target_path] = future.result()
+            except Exception as e:
+                print(f"❌ Failed to download {target_path}: {e}")
+                failures[target_path] = e
+    return results, failures
+
+
+class TemplateStore:
+    """
+    Persistent local copies of template blobs, each stored under its storage_path.
+
+    index.json next to the files records every blob's generation, size and last
+    use, so a restarted process keeps using what is already on disk. Freshness is
+    checked with a metadata-only get_blob() at most once per check_interval
+    seconds per blob, and the least recently used files are evicted once the
+    store grows past max_bytes.
+    """
+
+    def __init__(self, root=None, max_bytes=512 * 1024 * 1024, check_interval=30):
+        self.root = root or os.path.join(tempfile.gettempdir(), "hvt_template_store")
+        self.files_dir = os.path.join(self.root, "files")
+        self.index_path = os.path.join(self.root, "index.json")
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._path_locks = {}
+        self._checked = {}  # storage_path -> when its generation was last confirmed
+        os.makedirs(self.files_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def local_path(self, storage_path):
+        path = os.path.normpath(os.path.join(self.files_dir, storage_path))
+        if not path.startswith(self.files_dir + os.sep):
+            raise ValueError(f"Invalid storage path: {storage_path}")
+        return path
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️ Could not read template store index {self.index_path}: {e}")
+            return {}
+
+        # Drop entries whose file went missing or changed while the process was down
+        valid = {}
+        for storage_path, entry in index.items():
+            try:
+                path = self.local_path(storage_path)
+                if os.path.isfile(path) and os.path.getsize(path) == entry.get("size"):
+                    valid[storage_path] = entry
+            except (ValueError, OSError):
+                continue
+        return valid
+
+    def _save_index(self):
+        """Must be called with the lock held"""
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"⚠️ Could not write template store index {self.index_path}: {e}")
+
+    def _path_lock(self, storage_path):
+        with self._lock:
+            return self._path_locks.setdefault(storage_path, threading.Lock())
+
+    def _download(self, bucket, storage_path, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        blob = bucket.blob(storage_path)
+        fd, part_path = tempfile.mkstemp(suffix=".part", dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            blob.download_to_filename(part_path)
+            os.replace(part_path, path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        return blob_version(blob)
+
+    def fetch(self, bucket, storage_path, version=None):
+        """
+        Local path of an up-to-date copy of storage_path. Pass version when it is
+        already known from a bucket listing to skip the metadata request.
+        """
+        path = self.local_path(storage_path)
+        with self._path_lock(storage_path):
+            with self._lock:
+                entry = self._index.get(storage_path)
+                checked_at = self._checked.get(storage_path)
+
+            current = entry["version"] if entry and os.path.isfile(path) else None
+            if current is not None:
+                if version is None and (checked_at is None or time.monotonic() - checked_at > self.check_interval):
+                    blob = bucket.get_blob(storage_path)
+                    if blob is None:
+                        raise FileNotFoundError(f"Template not found in storage: {storage_path}")
+                    version = blob_version(blob)
+                if version is not None and version != current:
+                    current = None
+
+            if current is None:
+                current = self._download(bucket, storage_path, path) or version
+                print(f"⬇️ Downloaded template {storage_path}")
+
+            with self._lock:
+                self._checked[storage_path] = time.monotonic()
+                self._index[storage_path] = {
+                    "version": current,
+                    "size": os.path.getsize(path),
+                    "last_used": time.time(),
+                }
+                self._evict(keep=storage_path)
+                self._save_index()
+        return path
+
+    def version(self, storage_path):
+        with self._lock:
+            entry = self._index.get(storage_path)
+            return entry["version"] if entry else None
+
+    def invalidate(self, storage_path=None):
+        """Force a metadata check on the next fetch of storage_path, or of every blob"""
+        with self._lock:
+            if storage_path is None:
+                self._checked.clear()
+            else:
+                self._checked.pop(storage_path, None)
+
+    def discard(self, storage_path):
+        """Drop the local copy of a blob whose template was deleted or moved"""
+        with self._path_lock(storage_path):
+            with self._lock:
+                entry = self._index.pop(storage_path, None)
+                self._checked.pop(storage_path, None)
+                if entry is not None:
+                    self._save_index()
+            try:
+                os.remove(self.local_path(storage_path))
+            except (OSError, ValueError):
+                pass
+
+    def _evict(self, keep=None):
+        """Remove least recently used files beyond max_bytes, must be called with the lock held"""
+        total = sum(entry["size"] for entry in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for storage_path, entry in sorted(self._index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if storage_path == keep:
+                continue
+            try:
+                os.remove(self.local_path(storage_path))
+            except OSError:
+                pass
+            del self._index[storage_path]
+            self._checked.pop(storage_path, None)
+            total -= entry["size"]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._index),
+                "bytes": sum(entry["size"] for entry in self._index.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+class BlobListing:
+    """
+    Names and generations of every template blob, from one list_blobs call per
+    template prefix. Refreshed on the first lookup after ttl seconds, or after
+    invalidate() when the listeners see a template change, so existence checks
+    are dict reads.
+
+    The listing runs outside the lock and only one thread lists at a time.
+    While it runs other callers keep using the previous listing, unless it was
+    invalidated, in which case they wait for the new one. Paths outside the
+    listed prefixes are checked with a call for that blob.
+    """
+
+    def __init__(self, prefixes=None, ttl=300):
+        self.prefixes = list(prefixes or TEMPLATE_STORAGE_PREFIXES)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._versions = None  # blob name -> version
+        self._listed_at = None
+        self._epoch = 0  # bumped by invalidate(), a listing started before it is not kept
+
+    def covers(self, storage_path):
+        return any(storage_path.startswith(prefix) for prefix in self.prefixes)
+
+    def _fresh(self):
+        """Must be called with the lock held"""
+        return self._versions is not None and time.monotonic() - self._listed_at <= self.ttl
+
+    def _current(self, bucket):
+        with self._lock:
+            if self._fresh():
+                return self._versions
+            stale = self._versions
+
+        if stale is not None and not self._refresh_lock.acquire(blocking=False):
+            # Another thread is listing already
+            return stale
+        if stale is None:
+            self._refresh_lock.acquire()
+        try:
+            with self._lock:
+                if self._fresh():
+                    return self._versions
+                epoch = self._epoch
+            try:
+                versions = {}
+                for prefix in self.prefixes:
+                    for blob in bucket.list_blobs(prefix=prefix):
+                        versions[blob.name] = blob_version(blob)
+            except Exception as e:
+                print(f"⚠️ Could not list template blobs: {e}")
+                return None
+            with self._lock:
+                if self._epoch == epoch:
+                    self._versions = versions
+                    self._listed_at = time.monotonic()
+            return versions
+        finally:
+            self._refresh_lock.release()
+
+    def exists(self, bucket, storage_path):
+        versions = self._current(bucket) if self.covers(storage_path) else None
+        if versions is None:
+            # Listing failed or does not cover this path, ask about this one blob instead
+            return bucket.blob(storage_path).exists()
+        return storage_path in versions
+
+    def version(self, bucket, storage_path):
+        """None when unknown, the template store then checks the blob itself"""
+        if not self.covers(storage_path):
+            return None
+        versions = self._current(bucket)
+        return versions.get(storage_path) if versions else None
+
+    def versions(self, bucket, prefix=""):
+        """{name: version} for the listed blobs under prefix, empty if the listing failed"""
+        versions = self._current(bucket) or {}
+        return {name: version for name, version in versions.items() if name.startswith(prefix)}
+
+    def invalidate(self):
+        with self._lock:
+            self._epoch += 1
+            self._listed_at = None
+            self._versions = None
+
+
+template_store = TemplateStore()
+blob_listing = BlobListing()
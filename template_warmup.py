@@ -0,0 +1,121 @@
+import threading
+import time
+
+from docx_template_cache import docx_template_cache
+from template_cache import proposal_template_cache
+from template_registry import DOCX_MIME_TYPE, load_template_registry
+from template_store import blob_listing, download_in_parallel, template_store
+
+WARMUP_DOC_TYPES = ["Internship Offer", "NDA", "Invoice", "Contract"]
+
+
+class TemplateWarmup:
+    """
+    Background warm-up after a deploy: loads the template registry, downloads
+    every active public DOCX template into the template store and parses it into
+    the DocxTemplate cache, then fills the proposal template cache.
+
+    Requests that arrive meanwhile share the same store and caches, so they
+    reuse whatever has finished and wait on a download that is in flight rather
+    than starting another one.
+    """
+
+    def __init__(self, firestore_db, bucket):
+        self.firestore_db = firestore_db
+        self.bucket = bucket
+        self._lock = threading.Lock()
+        self._thread = None
+        self._status = {
+            "state": "pending",
+            "total": 0,
+            "done": 0,
+            "failed": 0,
+            "current": None,
+            "errors": [],
+            "started_at": None,
+            "finished_at": None,
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="template-warmup", daemon=True)
+                self._thread.start()
+
+    def progress(self):
+        with self._lock:
+            return dict(self._status, errors=list(self._status["errors"]))
+
+    def _update(self, **changes):
+        with self._lock:
+            self._status.update(changes)
+
+    def _step_done(self, error=None, label=None):
+        with self._lock:
+            self._status["done"] += 1
+            if error is not None:
+                self._status["failed"] += 1
+                self._status["errors"].append(f"{label}: {error}")
+
+    def _docx_templates(self, registry):
+        for doc_type in WARMUP_DOC_TYPES:
+            for doc_id, data in registry.ordered(doc_type):
+                if (data.get("visibility") == "Public" and data.get("file_type") == DOCX_MIME_TYPE
+                        and data.get("storage_path") and data.get("is_active", True)):
+                    yield data["storage_path"]
+
+    def _warm_docx(self, storage_path):
+        self._update(current=storage_path)
+        try:
+            path = template_store.fetch(self.bucket, storage_path, blob_listing.version(self.bucket, storage_path))
+            docx_template_cache.preload(path)
+        except Exception as e:
+            self._step_done(e, storage_path)
+            raise
+        self._step_done()
+
+    def _run(self):
+        self._update(state="running", started_at=time.time())
+        try:
+            self._update(current="template registry")
+            registry = load_template_registry(self.firestore_db)
+            storage_paths = list(dict.fromkeys(self._docx_templates(registry)))
+            self._update(total=len(storage_paths) + 1)
+
+            download_in_parallel([(path, lambda path=path: self._warm_docx(path)) for path in storage_paths])
+
+            self._update(current="proposal templates")
+            try:
+                proposal_template_cache.get(self.firestore_db, self.bucket)
+                self._step_done()
+            except Exception as e:
+                self._step_done(e, "proposal templates")
+
+            self._update(state="finished")
+            print(f"✅ Template warm-up finished: {len(storage_paths)} DOCX templates and the proposal templates")
+        except Exception as e:
+            self._update(state="failed")
+            with self._lock:
+                self._status["errors"].append(str(e))
+            print(f"❌ Template warm-up failed: {e}")
+        finally:
+            self._update(current=None, finished_at=time.time())
+
+
+_warmup = None
+_warmup_lock = threading.Lock()
+
+
+def start_template_warmup(firestore_db, bucket):
+    """Start the warm-up once per process, later calls (every Streamlit rerun) return the same one"""
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = TemplateWarmup(firestore_db, bucket)
+            _warmup.start()
+        return _warmup
+
+
+def template_warmup_progress():
+    """Progress dict of the warm-up, or None if it was never started"""
+    return _warmup.progress() if _warmup is not None else None